@@ -0,0 +1,146 @@
+"""Deterministic reStructuredText corpus generator for our benchmarks
+
+Usage: python benchmarks/corpus.py SHAPE DIRECTORY [--scale SCALE]
+"""
+# Load in our dependencies
+from __future__ import absolute_import, print_function
+import argparse
+import io
+import os
+import random
+
+# Define constants
+SEED = 20131122
+WORDS = ('lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit', 'sed', 'do', 'eiusmod',
+         'tempor', 'incididunt', 'ut', 'labore', 'et', 'dolore', 'magna', 'aliqua')
+SECTION_CHARS = '=-~^"\'`#*+<>'
+
+
+def _sentence(rand, count=12):
+    return ' '.join(rand.choice(WORDS) for _ in range(count)).capitalize() + '.'
+
+
+def _title(rand):
+    return ' '.join(rand.choice(WORDS) for _ in range(3)).title()
+
+
+def _heading(rand, depth, index):
+    title = '{title} {index}'.format(title=_title(rand), index=index)
+    return '{title}\n{underline}\n'.format(title=title, underline=SECTION_CHARS[depth] * len(title))
+
+
+def _paragraph(rand, sentences=4):
+    return ' '.join(_sentence(rand) for _ in range(sentences)) + '\n'
+
+
+def _small_document(rand, index):
+    return '\n'.join([
+        _heading(rand, 0, index),
+        _paragraph(rand),
+        '- {item}\n- {item}\n- `link <https://example.com/{index}>`_\n'.format(item=_sentence(rand, 4), index=index),
+        _paragraph(rand, 2),
+    ])
+
+
+def _huge_document(rand, scale):
+    parts = [_heading(rand, 0, 0)]
+    for index in range(200 * scale):
+        parts.append(_heading(rand, 1, index))
+        parts.append(_paragraph(rand, 6))
+        parts.append('.. _target-{index}:\n\nSee target-{index}_ and *emphasis* with ``literal`` text.\n'
+                     .format(index=index))
+    return '\n'.join(parts)
+
+
+def _deep_sections_document(rand, scale):
+    # DEV: We walk down and back up our section levels so every level gets used many times
+    parts = []
+    depth = 0
+    for index in range(100 * scale):
+        parts.append(_heading(rand, depth, index))
+        parts.append(_paragraph(rand, 1))
+        if depth + 1 < len(SECTION_CHARS) and rand.random() < 0.7:
+            depth += 1
+        else:
+            depth = rand.randint(1, depth) if depth else 0
+    return '\n'.join(parts)
+
+
+def _grid_table(rand, rows, columns):
+    width = 14
+    border = '+' + '+'.join(['-' * width] * columns) + '+\n'
+    header_border = '+' + '+'.join(['=' * width] * columns) + '+\n'
+    lines = [border]
+    for row in range(rows):
+        cells = [' ' + ' '.join(rand.choice(WORDS) for _ in range(2)) for _ in range(columns)]
+        lines.append('|' + '|'.join(cell[:width].ljust(width) for cell in cells) + '|\n')
+        lines.append(header_border if row == 0 else border)
+    return ''.join(lines)
+
+
+def _tables_directives_document(rand, scale):
+    parts = [_heading(rand, 0, 0)]
+    for index in range(40 * scale):
+        parts.append(_heading(rand, 1, index))
+        parts.append('.. note::\n\n   {sentence}\n'.format(sentence=_sentence(rand)))
+        parts.append(_grid_table(rand, 6, 4))
+        parts.append('.. list-table::\n   :header-rows: 1\n\n' + ''.join(
+            '   * - {a}\n     - {b}\n'.format(a=_title(rand), b=_sentence(rand, 3)) for _ in range(5)))
+        parts.append('.. code-block:: text\n\n   {sentence}\n'.format(sentence=_sentence(rand)))
+        parts.append('.. |sub-{index}| replace:: {title}\n\nUsing |sub-{index}| inline.\n'
+                     .format(index=index, title=_title(rand)))
+    return '\n'.join(parts)
+
+
+def generate_documents(shape, scale=1):
+    """Generate a deterministic corpus of documents
+
+    :param string shape: One of `SHAPES`
+    :param int scale: Multiplier for the size of our corpus
+    :rtype list: List of `(relative filepath, content)` tuples
+    """
+    rand = random.Random('{seed}-{shape}-{scale}'.format(seed=SEED, shape=shape, scale=scale))
+    if shape == 'many-small':
+        return [(os.path.join('dir{dir}'.format(dir=index % 10), 'doc{index}.rst'.format(index=index)),
+                 _small_document(rand, index)) for index in range(500 * scale)]
+    elif shape == 'huge':
+        return [('huge.rst', _huge_document(rand, scale))]
+    elif shape == 'deep-sections':
+        return [('deep{index}.rst'.format(index=index), _deep_sections_document(rand, scale)) for index in range(5)]
+    elif shape == 'tables-directives':
+        return [('tables{index}.rst'.format(index=index), _tables_directives_document(rand, scale))
+                for index in range(5)]
+    raise ValueError('Unknown corpus shape "{shape}"'.format(shape=shape))
+
+
+SHAPES = ('many-small', 'huge', 'deep-sections', 'tables-directives')
+
+
+def write_corpus(shape, directory, scale=1):
+    """Write a generated corpus to disk
+
+    :rtype list: List of absolute filepaths written
+    """
+    filepaths = []
+    for relative_path, content in generate_documents(shape, scale):
+        filepath = os.path.join(directory, relative_path)
+        if not os.path.isdir(os.path.dirname(filepath)):
+            os.makedirs(os.path.dirname(filepath))
+        with io.open(filepath, 'w', encoding='utf-8') as f:
+            f.write(content)
+        filepaths.append(filepath)
+    return filepaths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a deterministic reStructuredText corpus')
+    parser.add_argument('shape', choices=SHAPES)
+    parser.add_argument('directory')
+    parser.add_argument('--scale', default=1, type=int)
+    args = parser.parse_args()
+    filepaths = write_corpus(args.shape, args.directory, scale=args.scale)
+    print('Wrote {count} files to {directory}'.format(count=len(filepaths), directory=args.directory))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark time and memory for error-heavy documents with and without `compact` errors
+
+Usage: python benchmarks/errors.py [--errors COUNT]
+"""
+# Load in our dependencies
+from __future__ import absolute_import, print_function
+import argparse
+import gc
+import timeit
+import tracemalloc
+
+from restructuredtext_lint import Linter
+
+# Define constants
+DEFAULT_ERROR_COUNT = 2000
+REPEAT = 3
+
+
+def generate_document(error_count):
+    """Generate a document which reports roughly `error_count` errors"""
+    # DEV: Each section reports a short underline warning and an unknown target error
+    parts = []
+    for index in range(error_count // 2):
+        title = 'Section {index}'.format(index=index)
+        parts.append('{title}\n{underline}\n\nSee missing-{index}_ for details.\n'.format(
+            title=title, underline='=' * (len(title) - 1), index=index))
+    return '\n'.join(parts)
+
+
+def measure(linter, content, compact):
+    """Measure a single configuration
+
+    :returns: Tuple of `(error count, seconds, retained bytes, peak bytes)`
+    """
+    seconds = min(timeit.repeat(lambda: linter.lint(content, compact=compact), number=1, repeat=REPEAT))
+
+    # DEV: Retained memory is what's still alive while we hold onto our errors (e.g. the document tree)
+    gc.collect()
+    tracemalloc.start()
+    errors = linter.lint(content, compact=compact)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(errors), seconds, retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark compact errors on an error-heavy document')
+    parser.add_argument('--errors', default=DEFAULT_ERROR_COUNT, type=int, help='Approximate errors to generate')
+    args = parser.parse_args()
+
+    content = generate_document(args.errors)
+    linter = Linter()
+    linter.lint(content)  # Warm up
+
+    print('{mode:<10} {errors:>8} {ms:>10} {retained:>12} {peak:>10}'.format(
+        mode='mode', errors='errors', ms='ms', retained='retained MB', peak='peak MB'))
+    for compact in (False, True):
+        error_count, seconds, retained, peak = measure(linter, content, compact)
+        print('{mode:<10} {errors:>8} {ms:>10.1f} {retained:>12.2f} {peak:>10.2f}'.format(
+            mode='compact' if compact else 'default', errors=error_count, ms=seconds * 1000,
+            retained=retained / (1024.0 * 1024.0), peak=peak / (1024.0 * 1024.0)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark linting small documents with a large `rst_prolog`, reusing it versus prepending it to each document
+
+Usage: python benchmarks/prolog.py [--substitutions COUNT] [--documents COUNT]
+"""
+# Load in our dependencies
+from __future__ import absolute_import, print_function
+import argparse
+import timeit
+
+from restructuredtext_lint import Linter
+
+# Define constants
+DEFAULT_SUBSTITUTION_COUNT = 1000
+DEFAULT_DOCUMENT_COUNT = 50
+REPEAT = 3
+
+
+def generate_prolog(substitution_count):
+    """Generate a prolog of substitutions, roles, and targets (e.g. a project's shared `rst_prolog`)"""
+    lines = []
+    for index in range(substitution_count):
+        lines.append('.. |sub-{index}| replace:: Substitution number {index}'.format(index=index))
+        if index % 10 == 0:
+            lines.append('.. role:: role-{index}(emphasis)'.format(index=index))
+            lines.append('.. _target-{index}: https://example.com/{index}'.format(index=index))
+    return '\n'.join(lines) + '\n'
+
+
+def generate_document(index):
+    """Generate a small document which uses our prolog"""
+    return ('Document {index}\n===============\n\n'
+            'Uses |sub-{index}|, :role-0:`a role`, and target-0_.\n').format(index=index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark reusing a parsed rst_prolog across documents')
+    parser.add_argument('--substitutions', default=DEFAULT_SUBSTITUTION_COUNT, type=int,
+                        help='Substitutions to generate in our prolog')
+    parser.add_argument('--documents', default=DEFAULT_DOCUMENT_COUNT, type=int, help='Documents to lint')
+    args = parser.parse_args()
+
+    prolog = generate_prolog(args.substitutions)
+    documents = [generate_document(index) for index in range(args.documents)]
+
+    # DEV: A prolog which can't be reused falls back to being prepended, so we force that to compare against it
+    reused_linter = Linter(rst_prolog=prolog)
+    prepended_linter = Linter(rst_prolog=prolog)
+    prepended_linter._get_parsed_prolog = lambda rst_prolog: None
+
+    print('{mode:<10} {docs:>8} {ms:>10} {docs_per_sec:>10}'.format(
+        mode='mode', docs='docs', ms='ms', docs_per_sec='docs/sec'))
+    for mode, linter in (('prepended', prepended_linter), ('reused', reused_linter)):
+        linter.lint(documents[0])  # Warm up (and parse our prolog once)
+        seconds = min(timeit.repeat(lambda: [linter.lint(document) for document in documents],
+                                    number=1, repeat=REPEAT))
+        print('{mode:<10} {docs:>8} {ms:>10.1f} {docs_per_sec:>10.1f}'.format(
+            mode=mode, docs=len(documents), ms=seconds * 1000, docs_per_sec=len(documents) / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""Benchmark `lint`, `lint_file`, and `rst-lint` end to end against generated corpora
+
+Usage: python benchmarks/run.py [--shape SHAPE] [--target TARGET] [--scale SCALE] [--save-baseline]
+
+Each benchmark runs in its own process so peak RSS is measured in isolation.
+Results are compared against `benchmarks/baseline.json` and we exit with 1 if throughput regressed past `--tolerance`.
+"""
+# Load in our dependencies
+from __future__ import absolute_import, print_function
+import argparse
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # pragma: no cover (Windows)
+    resource = None
+
+# Define constants
+_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE_PATH = os.path.join(_dir, 'baseline.json')
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.25
+TARGETS = ('lint', 'lint_file', 'cli')
+
+
+def _peak_rss_mb():
+    """Retrieve the peak RSS of our process in MB (or `None` if unsupported)"""
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # DEV: Linux reports kilobytes, macOS reports bytes
+    if sys.platform == 'darwin':
+        return peak_rss / (1024.0 * 1024.0)
+    return peak_rss / 1024.0
+
+
+def _run_target(target, filepaths, contents):
+    """Run a benchmark target once over every file"""
+    if target == 'lint':
+        import restructuredtext_lint
+        for filepath, content in zip(filepaths, contents):
+            restructuredtext_lint.lint(content, filepath)
+    elif target == 'lint_file':
+        import restructuredtext_lint
+        for filepath in filepaths:
+            restructuredtext_lint.lint_file(filepath)
+    elif target == 'cli':
+        from restructuredtext_lint.cli import _main
+        try:
+            _main(filepaths, stream=io.StringIO(), no_cache=True)
+        except SystemExit:
+            pass
+    else:
+        raise ValueError('Unknown benchmark target "{target}"'.format(target=target))
+
+
+def _worker(target, corpus_dir, repeat):
+    """Time a single target against a corpus directory and print our results as JSON"""
+    filepaths = sorted(os.path.join(root, file) for root, _, files in os.walk(corpus_dir) for file in files)
+    total_bytes = sum(os.path.getsize(filepath) for filepath in filepaths)
+    # DEV: We read our files outside of our timings so `lint` measures parsing alone
+    contents = []
+    if target == 'lint':
+        for filepath in filepaths:
+            with io.open(filepath, encoding='utf-8') as f:
+                contents.append(f.read())
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _run_target(target, filepaths, contents)
+        timings.append(time.perf_counter() - start)
+    seconds = min(timings)
+    print(json.dumps({
+        'docs': len(filepaths),
+        'bytes': total_bytes,
+        'seconds': seconds,
+        'docs_per_sec': len(filepaths) / seconds,
+        'mb_per_sec': total_bytes / (1024.0 * 1024.0) / seconds,
+        'peak_rss_mb': _peak_rss_mb(),
+    }))
+
+
+def _compare(name, result, baseline_result, tolerance):
+    """Format a result against its baseline
+
+    :returns: Tuple of `(line, regressed)`
+    """
+    line = '{name:<30} {docs_per_sec:>10.1f} {mb_per_sec:>8.2f} {peak_rss:>8}'.format(
+        name=name, docs_per_sec=result['docs_per_sec'], mb_per_sec=result['mb_per_sec'],
+        peak_rss='-' if result['peak_rss_mb'] is None else '{0:.1f}'.format(result['peak_rss_mb']))
+    if not baseline_result:
+        return line + '  (no baseline)', False
+    ratio = result['docs_per_sec'] / baseline_result['docs_per_sec']
+    regressed = ratio < 1 - tolerance
+    return line + '  {ratio:>6.2f}x{flag}'.format(ratio=ratio, flag='  REGRESSION' if regressed else ''), regressed
+
+
+def main():
+    # DEV: Import our corpus relative to this file so we can run as a script from anywhere
+    sys.path.insert(0, _dir)
+    from corpus import SHAPES, write_corpus
+
+    parser = argparse.ArgumentParser(description='Benchmark restructuredtext-lint against generated corpora')
+    parser.add_argument('--shape', action='append', choices=SHAPES, help='Corpus shape to run (default: all)')
+    parser.add_argument('--target', action='append', choices=TARGETS, help='Target to benchmark (default: all)')
+    parser.add_argument('--scale', default=1, type=int, help='Multiplier for the size of each corpus')
+    parser.add_argument('--repeat', default=DEFAULT_REPEAT, type=int, help='Runs per benchmark, we keep the best')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help='Path to our baseline results')
+    parser.add_argument('--save-baseline', action='store_true', help='Overwrite our baseline with these results')
+    parser.add_argument('--tolerance', default=DEFAULT_TOLERANCE, type=float,
+                        help='Allowed drop in docs/sec before flagging a regression (default: {default})'
+                        .format(default=DEFAULT_TOLERANCE))
+    parser.add_argument('--worker', nargs=2, metavar=('TARGET', 'CORPUS_DIR'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.worker[0], args.worker[1], args.repeat)
+        return
+
+    # Load our baseline
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    if baseline.get('scale', args.scale) != args.scale:
+        print('Baseline was recorded at scale {scale}, comparisons will be skipped'.format(scale=baseline['scale']))
+        baseline = {}
+    baseline_results = baseline.get('results', {})
+
+    # Run each of our benchmarks in its own process
+    results = {}
+    regressed = False
+    print('{name:<30} {docs:>10} {mb:>8} {rss:>8}  {ratio:>7}'.format(
+        name='benchmark', docs='docs/sec', mb='MB/sec', rss='peak MB', ratio='vs base'))
+    for shape in args.shape or SHAPES:
+        corpus_dir = tempfile.mkdtemp(prefix='rst-lint-bench-')
+        try:
+            write_corpus(shape, corpus_dir, scale=args.scale)
+            for target in args.target or TARGETS:
+                name = '{shape}/{target}'.format(shape=shape, target=target)
+                output = subprocess.check_output((sys.executable, os.path.abspath(__file__), '--worker', target,
+                                                  corpus_dir, '--repeat', str(args.repeat)),
+                                                 universal_newlines=True)
+                results[name] = json.loads(output)
+                line, result_regressed = _compare(name, results[name], baseline_results.get(name), args.tolerance)
+                regressed = regressed or result_regressed
+                print(line)
+        finally:
+            shutil.rmtree(corpus_dir)
+
+    if args.save_baseline:
+        baseline_results.update(results)
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump({'scale': args.scale, 'results': baseline_results}, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+        print('Saved baseline to {path}'.format(path=args.baseline))
+    elif regressed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
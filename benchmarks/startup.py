@@ -0,0 +1,88 @@
+"""Benchmark our startup time via `python -X importtime`
+
+Usage: python benchmarks/startup.py [--max-import-ms MS]
+
+Reports the cumulative import time of our package/CLI, the slowest modules they pull in,
+and the wall time of `rst-lint --version`. We exit with 1 if any `docutils` module is loaded on import
+or if our import time exceeds `--max-import-ms`.
+"""
+# Load in our dependencies
+from __future__ import absolute_import, print_function
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# Define constants
+_dir = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(_dir, os.pardir)
+MODULES = ('restructuredtext_lint', 'restructuredtext_lint.cli')
+DEFAULT_SLOWEST_COUNT = 5
+DEFAULT_REPEAT = 5
+
+
+def _env():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT_DIR, env.get('PYTHONPATH')]))
+    return env
+
+
+def import_times(module):
+    """Import a module in a fresh interpreter and parse its `-X importtime` output
+
+    :rtype list: List of `(module name, self microseconds, cumulative microseconds)` tuples
+    """
+    output = subprocess.run((sys.executable, '-X', 'importtime', '-c', 'import ' + module), env=_env(),
+                            stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+    timings = []
+    for line in output.splitlines():
+        # e.g. "import time:       520 |      19357 |       docutils.core"
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings.append((name.strip(), int(self_us), int(cumulative_us)))
+    return timings
+
+
+def version_wall_time(repeat=DEFAULT_REPEAT):
+    """Time `rst-lint --version` end to end, keeping the best of our runs"""
+    cli_path = os.path.join(ROOT_DIR, 'restructuredtext_lint', 'cli.py')
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run((sys.executable, cli_path, '--version'), env=_env(), stdout=subprocess.PIPE, check=True)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark restructuredtext-lint startup time')
+    parser.add_argument('--max-import-ms', type=float, help='Fail if any of our modules takes longer to import')
+    parser.add_argument('--slowest', default=DEFAULT_SLOWEST_COUNT, type=int, help='Number of slow modules to list')
+    args = parser.parse_args()
+
+    failed = False
+    for module in MODULES:
+        timings = import_times(module)
+        total_ms = next(cumulative for name, _, cumulative in timings if name == module) / 1000.0
+        print('import {module}: {ms:.1f}ms'.format(module=module, ms=total_ms))
+        for name, self_us, _ in sorted(timings, key=lambda timing: timing[1], reverse=True)[:args.slowest]:
+            print('  {ms:>8.2f}ms  {name}'.format(ms=self_us / 1000.0, name=name))
+
+        # Guard against regressions
+        docutils_modules = [name for name, _, _ in timings if name == 'docutils' or name.startswith('docutils.')]
+        if docutils_modules:
+            print('  REGRESSION: `docutils` loaded on import ({modules})'.format(modules=', '.join(docutils_modules)))
+            failed = True
+        if args.max_import_ms is not None and total_ms > args.max_import_ms:
+            print('  REGRESSION: import took longer than {ms}ms'.format(ms=args.max_import_ms))
+            failed = True
+
+    print('rst-lint --version: {ms:.1f}ms'.format(ms=version_wall_time() * 1000))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Benchmark how much time each transform preset saves
+
+Usage: python benchmarks/transforms.py [file.rst ...]
+"""
+# Load in our dependencies
+from __future__ import absolute_import, print_function
+import io
+import os
+import sys
+import timeit
+
+from restructuredtext_lint import Linter
+from restructuredtext_lint.lint import TRANSFORM_PRESETS, TRANSFORMS_ALL
+
+# Define constants
+_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FILEPATHS = [os.path.join(_dir, os.pardir, 'README.rst')]
+REPEAT = 5
+
+
+def main():
+    filepaths = sys.argv[1:] or DEFAULT_FILEPATHS
+    documents = []
+    for filepath in filepaths:
+        with io.open(filepath, encoding='utf-8') as f:
+            documents.append((filepath, f.read()))
+    linter = Linter()
+
+    # Time each preset, taking the best of our runs to reduce noise
+    timings = {}
+    for preset in TRANSFORM_PRESETS:
+        def run():
+            for filepath, content in documents:
+                linter.lint(content, filepath, transforms=preset)
+        run()  # Warm up
+        timings[preset] = min(timeit.repeat(run, number=1, repeat=REPEAT)) / len(documents)
+
+    # Report our results relative to applying every transform
+    baseline = timings[TRANSFORMS_ALL]
+    print('{preset:<16} {ms:>10} {saved:>8}'.format(preset='preset', ms='ms/doc', saved='saved'))
+    for preset in TRANSFORM_PRESETS:
+        print('{preset:<16} {ms:>10.2f} {saved:>7.1f}%'.format(
+            preset=preset, ms=timings[preset] * 1000, saved=(1 - timings[preset] / baseline) * 100))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,16 @@
 # Load in our dependencies
 from __future__ import absolute_import
-from restructuredtext_lint.lint import lint, lint_file
+from restructuredtext_lint.incremental import IncrementalLinter
+from restructuredtext_lint.lint import (Linter, LintError, LintProfile, iter_lint_files, lint, lint_file, lint_files,
+                                        lint_many)
 
 # Export lint functions
+IncrementalLinter = IncrementalLinter
+Linter = Linter
+LintError = LintError
+LintProfile = LintProfile
 lint = lint
 lint_file = lint_file
+lint_files = lint_files
+lint_many = lint_many
+iter_lint_files = iter_lint_files
@@ -0,0 +1,161 @@
+# Load in our dependencies
+# DEV: This module isn't imported by `restructuredtext_lint` itself so `import restructuredtext_lint` doesn't pay
+#      for loading `asyncio`
+from __future__ import absolute_import
+import asyncio
+from concurrent.futures import BrokenExecutor
+import functools
+import os
+import weakref
+
+from restructuredtext_lint.lint import (_detach_error, _discard_pool, _get_pool, _get_thread_linter, POOL_KINDS,
+                                        POOL_PROCESS, TIMEOUT_TYPE)
+
+
+def _lint(content, filepath=None, **kwargs):
+    """Lint content with our current thread's `Linter`"""
+    return _get_thread_linter().lint(content, filepath, **kwargs)
+
+
+def _lint_detached(content, filepath=None, **kwargs):
+    """Lint content inside of a worker process and return detached errors"""
+    return [_detach_error(error) for error in _lint(content, filepath, **kwargs)]
+
+
+def _lint_file(filepath, **kwargs):
+    """Read and lint a file with our current thread's `Linter`"""
+    return _get_thread_linter().lint_file(filepath, **kwargs)
+
+
+def _lint_file_detached(filepath, **kwargs):
+    """Read and lint a file inside of a worker process and return detached errors"""
+    return [_detach_error(error) for error in _lint_file(filepath, **kwargs)]
+
+
+class AsyncLinter(object):
+    """Linter for `asyncio` code which lints without blocking our event loop
+
+    Documents are read and parsed in a pool of processes (or threads), shared with `lint_many`. At most
+    `max_concurrency` documents are linted at once, the rest wait for their turn in the order they arrived.
+
+    :param int workers: Number of processes or threads to lint with, 0 or None uses every CPU
+    :param string pool: Kind of pool to lint in, either `'process'` (default) or `'thread'`. Threads still hold the
+        GIL while parsing so our event loop can slow down, but they avoid sending content to other processes
+    :param int max_concurrency: Maximum documents to lint at once (default: `workers`)
+    """
+    def __init__(self, workers=None, pool=POOL_PROCESS, max_concurrency=None):
+        if pool not in POOL_KINDS:
+            raise ValueError('Unknown pool "{pool}", expected one of: {kinds}'.format(
+                pool=pool, kinds=', '.join(POOL_KINDS)))
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = pool
+        self.max_concurrency = max_concurrency or self.workers
+        # DEV: An `asyncio.Semaphore` is bound to the event loop it's first used in, so we keep one per loop
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _get_semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def _run(self, func, args, timeout, kwargs):
+        """Run a lint function in our pool once it's our turn
+
+        :raises asyncio.TimeoutError: If linting takes longer than `timeout` seconds
+        """
+        async with self._get_semaphore():
+            loop = asyncio.get_running_loop()
+            # DEV: Our timeout starts once it's our turn so waiting behind other documents doesn't count against it.
+            #      We also pass it along to `lint` so a document which times out stops linting rather than running
+            #      to completion in the background. Cancelling stops waiting right away but can't interrupt our worker
+            executor = _get_pool(self.pool, self.workers)
+            try:
+                future = loop.run_in_executor(executor, functools.partial(func, *args, timeout=timeout, **kwargs))
+                errors = await asyncio.wait_for(future, timeout)
+            except BrokenExecutor:
+                _discard_pool(self.pool, self.workers, executor)
+                raise
+            if timeout is not None and any(error.type == TIMEOUT_TYPE for error in errors):
+                raise asyncio.TimeoutError()
+            return errors
+
+    async def lint(self, content, filepath=None, timeout=None, **kwargs):
+        """Lint reStructuredText and return errors
+
+        :param string content: reStructuredText to be linted
+        :param string filepath: Optional path to file, this will be returned as the source
+        :param float timeout: Optional seconds to spend on our document once it starts linting
+        :param kwargs: Additional keyword arguments to be passed to ``lint``
+        :raises asyncio.TimeoutError: If linting takes longer than `timeout` seconds
+        :rtype list: Same as ``lint``
+        """
+        func = _lint_detached if self.pool == POOL_PROCESS else _lint
+        return await self._run(func, (content, filepath), timeout, kwargs)
+
+    async def lint_file(self, filepath, timeout=None, **kwargs):
+        """Read and lint a specific file, both inside of our pool
+
+        :param float timeout: Optional seconds to spend on our file once it starts linting
+        :param kwargs: Additional keyword arguments to be passed to ``lint_file``
+        :raises asyncio.TimeoutError: If linting takes longer than `timeout` seconds
+        :rtype list: Same as ``lint_file``
+        """
+        func = _lint_file_detached if self.pool == POOL_PROCESS else _lint_file
+        return await self._run(func, (filepath,), timeout, kwargs)
+
+    async def lint_files(self, filepaths, timeout=None, **kwargs):
+        """Lint many files
+
+        We only queue up to `max_concurrency` of our files at a time, so other callers' documents are linted
+        alongside ours rather than after all of them. If a file fails (e.g. times out), we stop linting the rest
+
+        :param list filepaths: Paths to files to be linted
+        :param float timeout: Optional seconds to spend on each file once it starts linting
+        :param kwargs: Additional keyword arguments to be passed to ``lint_file``
+        :raises asyncio.TimeoutError: If any file takes longer than `timeout` seconds
+        :rtype list: List of error lists, in the same order as ``filepaths``
+        """
+        filepaths = list(filepaths)
+        results = [None] * len(filepaths)
+        indexes = iter(range(len(filepaths)))
+
+        async def lint_remaining_files():
+            for index in indexes:
+                results[index] = await self.lint_file(filepaths[index], timeout=timeout, **kwargs)
+        tasks = [asyncio.ensure_future(lint_remaining_files())
+                 for _ in range(min(self.max_concurrency, len(filepaths)))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return results
+
+
+# DEV: We build our default linter lazily so importing this module doesn't count our CPUs
+_default_async_linter = None
+
+
+def _get_default_async_linter():
+    """Retrieve the shared `AsyncLinter` used by `alint`, `alint_file`, and `alint_files`"""
+    global _default_async_linter
+    if _default_async_linter is None:
+        _default_async_linter = AsyncLinter()
+    return _default_async_linter
+
+
+async def alint(content, filepath=None, timeout=None, **kwargs):
+    """Lint reStructuredText without blocking our event loop, see `AsyncLinter.lint`"""
+    return await _get_default_async_linter().lint(content, filepath, timeout=timeout, **kwargs)
+
+
+async def alint_file(filepath, timeout=None, **kwargs):
+    """Read and lint a specific file without blocking our event loop, see `AsyncLinter.lint_file`"""
+    return await _get_default_async_linter().lint_file(filepath, timeout=timeout, **kwargs)
+
+
+async def alint_files(filepaths, timeout=None, **kwargs):
+    """Lint many files without blocking our event loop, see `AsyncLinter.lint_files`"""
+    return await _get_default_async_linter().lint_files(filepaths, timeout=timeout, **kwargs)
@@ -0,0 +1,139 @@
+# Load in our dependencies
+from __future__ import absolute_import
+import hashlib
+import json
+import os
+import tempfile
+
+# Define constants
+CACHE_FORMAT_VERSION = '1'
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024  # 64MB
+# DEV: Results for documents which pull in other files depend on more than their own content so we never cache them
+UNCACHEABLE_MARKERS = (b'include::', b':file:')
+
+
+def default_cache_dir():
+    """Retrieve our default cache directory (e.g. `~/.cache/restructuredtext-lint`)"""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'restructuredtext-lint')
+
+
+def _settings_fingerprint(settings):
+    """Serialize `docutils` settings for our keys, skipping private attributes (e.g. `_config_files`)"""
+    if settings is None:
+        return None
+    # DEV: A few settings are objects (e.g. `record_dependencies`), their `repr` is enough to tell them apart
+    return json.dumps(dict((name, value) for name, value in vars(settings).items() if not name.startswith('_')),
+                      sort_keys=True, default=repr)
+
+
+class ResultCache(object):
+    """On-disk cache of serialized lint errors keyed by file content
+
+    Keys are built from the file's content, our lint options (e.g. `rst_prolog`), our `docutils` settings
+    (e.g. from `docutils.conf`), the `docutils` version, and our package version. Entries are stored as one JSON file
+    each and the least recently used entries are evicted once the cache exceeds `max_size` bytes.
+
+    :param string cache_dir: Directory to store cache entries in
+    :param string version: Version of `restructuredtext-lint` to include in our keys
+    :param int max_size: Maximum size of our cache in bytes before evicting entries
+    :param settings: Optional `docutils` settings our files are linted with (e.g. `Linter.settings`)
+    """
+    def __init__(self, cache_dir, version, max_size=DEFAULT_MAX_SIZE, settings=None):
+        # DEV: We load `docutils` lazily to keep our CLI's startup fast
+        import docutils
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._salt = json.dumps([CACHE_FORMAT_VERSION, version, docutils.__version__,
+                                 _settings_fingerprint(settings)]).encode('utf-8')
+
+    def key(self, content, options):
+        """Generate a key for a file's content (as bytes) and its lint options
+
+        :returns: Key string or `None` if the content cannot be cached
+        """
+        if any(marker in content for marker in UNCACHEABLE_MARKERS):
+            return None
+        hasher = hashlib.sha256(self._salt)
+        hasher.update(json.dumps(options, sort_keys=True).encode('utf-8'))
+        hasher.update(content)
+        return hasher.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def get(self, key):
+        """Retrieve cached error dicts for a key
+
+        :returns: List of error dicts or `None` on a miss
+        """
+        if key is None:
+            self.misses += 1
+            return None
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r') as entry_file:
+                error_dicts = json.load(entry_file)['errors']
+        except (IOError, OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+
+        # Mark our entry as recently used for eviction
+        try:
+            os.utime(entry_path, None)
+        except OSError:
+            pass
+        self.hits += 1
+        return error_dicts
+
+    def set(self, key, error_dicts):
+        """Save error dicts for a key"""
+        if key is None:
+            return
+        entry_path = self._entry_path(key)
+        entry_dir = os.path.dirname(entry_path)
+        try:
+            if not os.path.isdir(entry_dir):
+                os.makedirs(entry_dir)
+            # DEV: Write to a temporary file and move it into place so concurrent runs never see partial entries
+            fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as entry_file:
+                json.dump({'errors': error_dicts}, entry_file)
+            os.replace(tmp_path, entry_path)
+            self.writes += 1
+        except (IOError, OSError):
+            # DEV: A cache we can't write to shouldn't fail our lint
+            pass
+
+    def prune(self):
+        """Evict least recently used entries until our cache fits within `max_size`
+
+        Our cache only grows when we write to it, so we skip walking it when we haven't (e.g. every file was a hit)
+        """
+        if not self.writes:
+            return
+        self.writes = 0
+        entries = []
+        total_size = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for file in files:
+                entry_path = os.path.join(root, file)
+                try:
+                    stat = os.stat(entry_path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry_path))
+                total_size += stat.st_size
+
+        entries.sort()
+        for _, size, entry_path in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                continue
+            total_size -= size
@@ -1,113 +1,484 @@
 # Load in our dependencies
 from __future__ import absolute_import
 import argparse
-from collections import OrderedDict
+from collections import Counter, deque, OrderedDict
+import itertools
 import json
 import os
 import sys
+import time
 
-from docutils.utils import Reporter
-
-from restructuredtext_lint.lint import lint_file
+from restructuredtext_lint.cache import default_cache_dir, DEFAULT_MAX_SIZE as DEFAULT_CACHE_MAX_SIZE, ResultCache
+from restructuredtext_lint.discovery import filter_to_scope, git_changed_files, iter_files
+from restructuredtext_lint.lint import (_get_default_linter, iter_lint_files, LintProfile, TIMEOUT_TYPE,
+                                        TRANSFORM_PRESETS, TRANSFORMS_ALL)
 
 # Generate our levels mapping constant
 # DEV: We use an ordered dict for ordering in `--help`
+# DEV: These mirror `docutils.utils.Reporter` levels, we inline them to avoid loading `docutils` on startup
 # http://repo.or.cz/docutils.git/blob/422cede485668203abc01c76ca317578ff634b30:/docutils/docutils/utils/__init__.py#l65
 WARNING_LEVEL_KEY = 'warning'
 LEVEL_MAP = OrderedDict([
-    ('debug', Reporter.DEBUG_LEVEL),  # 0
-    ('info', Reporter.INFO_LEVEL),  # 1
-    (WARNING_LEVEL_KEY, Reporter.WARNING_LEVEL),  # 2
-    ('error', Reporter.ERROR_LEVEL),  # 3
-    ('severe', Reporter.SEVERE_LEVEL),  # 4
+    ('debug', 0),  # Reporter.DEBUG_LEVEL
+    ('info', 1),  # Reporter.INFO_LEVEL
+    (WARNING_LEVEL_KEY, 2),  # Reporter.WARNING_LEVEL
+    ('error', 3),  # Reporter.ERROR_LEVEL
+    ('severe', 4),  # Reporter.SEVERE_LEVEL
 ])
 
 
 # Load in VERSION from standalone file
-with open(os.path.join(os.path.dirname(__file__), 'VERSION'), 'r') as version_file:
-    VERSION = version_file.read().strip()
+# DEV: We read our version lazily so importing `cli` doesn't touch the filesystem
+_version = None
+
+
+def _get_version():
+    global _version
+    if _version is None:
+        with open(os.path.join(os.path.dirname(__file__), 'VERSION'), 'r') as version_file:
+            _version = version_file.read().strip()
+    return _version
+
+
+def __getattr__(name):
+    # DEV: Preserve `cli.VERSION` for anyone who imports it
+    if name == 'VERSION':
+        return _get_version()
+    raise AttributeError('module {module!r} has no attribute {name!r}'.format(module=__name__, name=name))
+
 
 # Define default contents
 DEFAULT_FORMAT = 'text'
+FORMATS = ('text', 'json', 'jsonl')
 DEFAULT_LEVEL_KEY = WARNING_LEVEL_KEY
+DEFAULT_JOBS = 1
+DEFAULT_PROFILE_SLOWEST_COUNT = 10
+WATCH_INTERVAL = 0.5  # Seconds between polls when inotify is unavailable
+# DEV: Files are looked up in our cache in batches so a (potentially parallel) lint of the misses can stream
+CACHE_BATCH_SIZE = 1024
+
+
+def _error_to_dict(error, filepath=None):
+    """Serialize an error for output and caching
+
+    :param filepath: If provided, a `source` matching `filepath` is stored as `None` so we can restore it for any path
+    """
+    return {
+        'line': error.line,
+        'source': None if filepath is not None and error.source == filepath else error.source,
+        'level': error.level,
+        'type': error.type,
+        'message': error.message,
+        'full_message': error.full_message,
+    }
+
+
+def _iter_error_dicts(filepaths, jobs=DEFAULT_JOBS, cache=None, with_profiles=False, **kwargs):
+    """Lint files and yield each file's `(error dicts, profile)` in the same order as `filepaths`
+
+    When a `cache` is provided, files whose content and options were seen before skip parsing entirely.
+    `profile` is `None` unless `with_profiles` is set, and for files served from our `cache`
+    """
+    # DEV: We only serialize our errors so we lint in `compact` mode to avoid holding onto each document's tree
+    if cache is None:
+        for result in iter_lint_files(filepaths, jobs=jobs, with_profiles=with_profiles, compact=True, **kwargs):
+            yield [_error_to_dict(error) for error in result[1]], result[2] if with_profiles else None
+        return
+
+    # Look up each batch of files ahead of time so we only send misses to our (potentially parallel) linting
+    # DEV: We batch instead of looking up every file so we start linting before discovery finishes
+    max_file_size = kwargs.get('max_file_size')
+    # DEV: A timeout only changes the results of files which hit it, and those are never cached
+    cache_options = dict((name, value) for name, value in kwargs.items() if name != 'timeout')
+    filepaths = iter(filepaths)
+    while True:
+        batch_filepaths = list(itertools.islice(filepaths, CACHE_BATCH_SIZE))
+        if not batch_filepaths:
+            return
+        keys = []
+        cached_results = []
+        for filepath in batch_filepaths:
+            # DEV: Oversized files are never read (nor cached), `lint_file` reports them instead
+            key = None
+            try:
+                if max_file_size is None or os.path.getsize(filepath) <= max_file_size:
+                    with open(filepath, 'rb') as f:
+                        key = cache.key(f.read(), cache_options)
+            except (IOError, OSError):
+                # DEV: Unreadable files (e.g. broken symlinks) are left to `lint_file` so it raises their error
+                #      in order, after the files before them in our batch, and `_main` reports the right file
+                pass
+            keys.append(key)
+            cached_results.append(cache.get(key))
+        missed_filepaths = [filepath for filepath, result in zip(batch_filepaths, cached_results) if result is None]
+        missed_results = iter_lint_files(missed_filepaths, jobs=jobs, with_profiles=with_profiles, compact=True,
+                                         **kwargs)
+
+        for filepath, key, error_dicts in zip(batch_filepaths, keys, cached_results):
+            profile = None
+            if error_dicts is None:
+                missed_result = next(missed_results)
+                profile = missed_result[2] if with_profiles else None
+                error_dicts = [_error_to_dict(error, filepath) for error in missed_result[1]]
+                # DEV: Whether a file times out depends on how busy we were, so we retry it next time
+                if not any(error_dict['type'] == TIMEOUT_TYPE for error_dict in error_dicts):
+                    cache.set(key, error_dicts)
+            # DEV: Copy our dicts so restoring `source` doesn't mutate the copy we saved
+            yield [dict(error_dict, source=filepath if error_dict['source'] is None else error_dict['source'])
+                   for error_dict in error_dicts], profile
+
+
+def _write_profile_report(file_profiles, stream, slowest_count=DEFAULT_PROFILE_SLOWEST_COUNT):
+    """Write the slowest files and a per-phase breakdown across every file
+
+    :param list file_profiles: List of `(filepath, LintProfile)` tuples
+    """
+    total_profile = LintProfile()
+    for _, profile in file_profiles:
+        total_profile.merge(profile)
+    total_seconds = total_profile.total or 1
+
+    stream.write('Slowest files:\n')
+    slowest_file_profiles = sorted(file_profiles, key=lambda file_profile: file_profile[1].total, reverse=True)
+    for filepath, profile in slowest_file_profiles[:slowest_count]:
+        stream.write('  {ms:>10.2f}ms  {filepath}\n'.format(ms=profile.total * 1000, filepath=filepath))
+
+    stream.write('Phases:\n')
+    for phase, seconds in sorted(total_profile.timings.items(), key=lambda timing: timing[1], reverse=True):
+        stream.write('  {ms:>10.2f}ms {percent:>5.1f}%  {phase}\n'.format(
+            ms=seconds * 1000, percent=seconds / total_seconds * 100, phase=phase))
+    stream.write('Documents: {documents}, observer calls: {observer_calls}, total: {ms:.2f}ms\n'.format(
+        documents=total_profile.documents, observer_calls=total_profile.observer_calls,
+        ms=total_profile.total * 1000))
+
+
+def _level_name(level):
+    """Convert an error level to its name in `LEVEL_MAP` (e.g. `2` to `warning`)"""
+    for name, value in LEVEL_MAP.items():
+        if value == level:
+            return name
+    return str(level)
+
+
+def _file_report(filepath, error_dicts, profile):
+    """Summarize a linted file for `--stats` and `--report-file`
+
+    :param list error_dicts: Errors reported for our file
+    :param LintProfile profile: Profile of our file or `None` if it was served from our cache
+    """
+    return OrderedDict([
+        ('path', filepath),
+        ('bytes', os.path.getsize(filepath)),
+        # DEV: Files served from our cache weren't linted so they have no duration
+        ('seconds', None if profile is None else profile.total),
+        ('cached', profile is None),
+        ('errors', len(error_dicts)),
+        ('errors_by_level', dict(Counter(_level_name(err['level']) for err in error_dicts))),
+        ('errors_by_type', dict(Counter(err['type'] for err in error_dicts))),
+    ])
+
+
+def _build_report(file_reports, seconds, cache=None):
+    """Summarize our run for `--stats` and `--report-file`
+
+    :param list file_reports: Reports from `_file_report` for each linted file
+    :param float seconds: Wall time spent linting every file
+    :rtype OrderedDict: JSON serializable report
+    """
+    errors_by_level = OrderedDict((name, 0) for name in LEVEL_MAP)
+    errors_by_type = Counter()
+    for file_report in file_reports:
+        for name, count in file_report['errors_by_level'].items():
+            errors_by_level[name] = errors_by_level.get(name, 0) + count
+        errors_by_type.update(file_report['errors_by_type'])
+    return OrderedDict([
+        ('total_files', len(file_reports)),
+        ('total_bytes', sum(file_report['bytes'] for file_report in file_reports)),
+        ('total_errors', sum(file_report['errors'] for file_report in file_reports)),
+        ('errors_by_level', errors_by_level),
+        ('errors_by_type', OrderedDict(sorted(errors_by_type.items()))),
+        ('seconds', seconds),
+        ('docs_per_sec', len(file_reports) / seconds if seconds else None),
+        ('cache', None if cache is None else OrderedDict([('hits', cache.hits), ('misses', cache.misses)])),
+        ('files', file_reports),
+    ])
+
+
+def _write_stats(report, stream):
+    """Write a human readable summary of our run's report"""
+    summary = 'Linted {count} files'.format(count=report['total_files'])
+    if report['cache'] is not None:
+        summary += ' (cache: {cache[hits]} hits, {cache[misses]} misses)'.format(cache=report['cache'])
+    stream.write(summary + '\n')
+    stream.write('Read {bytes} bytes in {seconds:.2f}s ({docs_per_sec:.1f} docs/sec)\n'.format(
+        bytes=report['total_bytes'], seconds=report['seconds'], docs_per_sec=report['docs_per_sec'] or 0))
+    if not report['total_errors']:
+        stream.write('Errors: 0\n')
+        return
+    # e.g. Errors: 3 (warning: 2, error: 1)
+    #      Error types: TIMEOUT: 1, WARNING: 2
+    stream.write('Errors: {count} ({levels})\n'.format(
+        count=report['total_errors'], levels=', '.join('{name}: {count}'.format(name=name, count=count)
+                                                       for name, count in report['errors_by_level'].items() if count)))
+    stream.write('Error types: {types}\n'.format(
+        types=', '.join('{type}: {count}'.format(type=type, count=count)
+                        for type, count in report['errors_by_type'].items())))
 
 
 # Define our CLI function
-def _main(paths, format=DEFAULT_FORMAT, stream=sys.stdout, level=LEVEL_MAP[DEFAULT_LEVEL_KEY],
-          **kwargs):
+def _main(paths, format=DEFAULT_FORMAT, stream=sys.stdout, level=LEVEL_MAP[DEFAULT_LEVEL_KEY], jobs=DEFAULT_JOBS,
+          cache_dir=None, no_cache=False, cache_max_size=DEFAULT_CACHE_MAX_SIZE, stats=False, fail_fast=False,
+          max_errors=None, profile=False, changed_since=None, staged=False, include=None, exclude=None,
+          report_file=None, **kwargs):
     error_dicts = []
+    file_profiles = []
+    # DEV: `--stats` and `--report-file` share a report, which needs each file's profile for its duration
+    file_reports = [] if stats or report_file else None
     error_occurred = False
-    filepaths = []
+    reported_count = 0
+    if fail_fast:
+        max_errors = 1
 
+    # Verify all of our paths exist before we start linting
     for path in paths:
-        # Check if the given path is a file or a directory
-        if os.path.isfile(path):
-            filepaths.append(path)
-        elif os.path.isdir(path):
-            # Recurse over subdirectories to search for *.rst files
-            for root, subdir, files in os.walk(path):
-                for file in files:
-                    if file.endswith('.rst'):
-                        filepaths.append(os.path.join(root, file))
-        else:
+        if not os.path.exists(path):
             stream.write('Path "{path}" not found as a file nor directory\n'.format(path=path))
             sys.exit(1)
             return
 
-    for filepath in filepaths:
+    # If we're only linting changed files, then ask `git` for them and use our paths to scope them
+    if changed_since or staged:
+        try:
+            changed_filepaths = git_changed_files(changed_since=changed_since, staged=staged,
+                                                  include=include, exclude=exclude)
+        except RuntimeError as exc:
+            stream.write('{exc}\n'.format(exc=exc))
+            sys.exit(1)
+            return
+        filepaths = filter_to_scope(changed_filepaths, paths)
+    # Otherwise, search our directories for files
+    # DEV: This is a generator so we start linting as soon as we find our first file
+    else:
+        filepaths = iter_files(paths, include=include, exclude=exclude)
+
+    # DEV: Cached results skip parsing entirely so there'd be nothing to profile
+    cache = None
+    if not no_cache and not profile:
+        # DEV: Our settings include any `docutils.conf` so changing it doesn't serve stale results.
+        #      Building them loads `docutils`, which we'd need for any cache miss anyway
+        cache = ResultCache(cache_dir or default_cache_dir(), _get_version(), max_size=cache_max_size,
+                            settings=_get_default_linter().settings)
+
+    # DEV: Results are yielded in `filepaths` order, even when linting across multiple processes
+    # DEV: We pass along `level` and `max_errors` so each file stops parsing as soon as it exhausts our budget
+    # DEV: We track files as they're handed off for linting so we know which file each result (or issue) belongs to
+    pending_filepaths = deque()
+
+    def iter_pending_filepaths():
+        for filepath in filepaths:
+            pending_filepaths.append(filepath)
+            yield filepath
+    start = time.perf_counter()
+    file_errors_iter = _iter_error_dicts(iter_pending_filepaths(), jobs=jobs, cache=cache,
+                                         with_profiles=profile or file_reports is not None,
+                                         level=level, max_errors=max_errors, **kwargs)
+    while True:
         # Read and lint the file
         try:
-            unfiltered_file_errors = lint_file(filepath, **kwargs)
+            unfiltered_file_errors, file_profile = next(file_errors_iter)
+        except StopIteration:
+            break
         except Exception:
             # DEV: If we encounter any error from rst-lint itself, capture the file as well, https://github.com/twolfson/restructuredtext-lint/issues/65#issuecomment-3341112089  # noqa:E501
-            print(f'Encountered issue while linting: {filepath}', file=sys.stderr)
+            if pending_filepaths:
+                print(f'Encountered issue while linting: {pending_filepaths[0]}', file=sys.stderr)
             raise
-        file_errors = [err for err in unfiltered_file_errors if err.level >= level]
+        filepath = pending_filepaths.popleft()
+        if profile:
+            file_profiles.append((filepath, file_profile))
+        file_errors = [err for err in unfiltered_file_errors if err['level'] >= level]
+        if max_errors is not None:
+            file_errors = file_errors[:max_errors - reported_count]
+        reported_count += len(file_errors)
+        if file_reports is not None:
+            file_reports.append(_file_report(filepath, file_errors, file_profile))
 
         if file_errors:
             error_occurred = True
             if format == 'text':
                 for err in file_errors:
                     # e.g. WARNING readme.rst:12 Title underline too short.
-                    stream.write('{err.type} {err.source}:{err.line} {err.message}\n'.format(err=err))
+                    stream.write('{err[type]} {err[source]}:{err[line]} {err[message]}\n'.format(err=err))
             elif format == 'json':
-                error_dicts.extend({
-                    'line': error.line,
-                    'source': error.source,
-                    'level': error.level,
-                    'type': error.type,
-                    'message': error.message,
-                    'full_message': error.full_message,
-                } for error in file_errors)
+                error_dicts.extend(file_errors)
+            elif format == 'jsonl':
+                # DEV: Write each file's errors as soon as they're ready to keep memory flat and let consumers stream
+                for err in file_errors:
+                    stream.write(json.dumps(err) + '\n')
+                stream.flush()
+
+        # If we've reported as many errors as we're allowed, then stop linting further files
+        if max_errors is not None and reported_count >= max_errors:
+            break
+    file_errors_iter.close()
 
     if format == 'json':
         stream.write(json.dumps(error_dicts))
 
+    if cache is not None:
+        cache.prune()
+
+    # DEV: Our summary goes to `stderr` to keep `stdout` parseable
+    if file_reports is not None:
+        report = _build_report(file_reports, time.perf_counter() - start, cache=cache)
+        if stats:
+            _write_stats(report, sys.stderr)
+        if report_file:
+            with open(report_file, 'w') as f:
+                json.dump(report, f, indent=2)
+                f.write('\n')
+    if profile:
+        _write_profile_report(file_profiles, sys.stderr)
+
     if error_occurred:
         sys.exit(2)  # Using 2 for linting failure, 1 for internal error
     else:
         sys.exit(0)  # Success!
 
 
-def main():
-    # Set up options and parse arguments
+def _build_parser():
+    """Set up our command line options"""
     parser = argparse.ArgumentParser(description='Lint reStructuredText files. Returns 0 if all files pass linting, '
                                      '1 for an internal error, and 2 if linting failed.')
-    parser.add_argument('--version', action='version', version=VERSION)
-    parser.add_argument('paths', metavar='path', nargs='+', type=str, help='File/folder to lint')
-    parser.add_argument('--format', default=DEFAULT_FORMAT, type=str, choices=('text', 'json'),
+    parser.add_argument('--version', action='version', version=_get_version())
+    # DEV: `paths` is optional at the parser level so `--serve` can run without any, we enforce it in `_run`
+    parser.add_argument('paths', metavar='path', nargs='*', type=str, help='File/folder to lint')
+    parser.add_argument('--format', default=DEFAULT_FORMAT, type=str, choices=FORMATS,
                         help='Format of the output (default: "{default}")'.format(default=DEFAULT_FORMAT))
     parser.add_argument('--level', default=DEFAULT_LEVEL_KEY, type=str, choices=LEVEL_MAP.keys(),
                         help='Minimum error level to report (default: "{default}")'.format(default=DEFAULT_LEVEL_KEY))
     parser.add_argument('--rst-prolog', type=str,
                         help='reStructuredText content to prepend to all files (useful for substitutions)')
-    args = parser.parse_args()
+    parser.add_argument('--jobs', '-j', default=DEFAULT_JOBS, type=int,
+                        help='Number of processes to lint files with, 0 uses every CPU (default: {default})'
+                        .format(default=DEFAULT_JOBS))
+    parser.add_argument('--cache-dir', type=str,
+                        help='Directory to cache lint results in (default: "{default}")'
+                        .format(default=default_cache_dir()))
+    parser.add_argument('--no-cache', action='store_true', help='Disable caching of lint results')
+    parser.add_argument('--cache-max-size', default=DEFAULT_CACHE_MAX_SIZE, type=int,
+                        help='Maximum size of the cache in bytes before evicting old results (default: {default})'
+                        .format(default=DEFAULT_CACHE_MAX_SIZE))
+    parser.add_argument('--fail-fast', action='store_true',
+                        help='Stop linting after the first reported error (same as `--max-errors 1`)')
+    parser.add_argument('--max-errors', type=int,
+                        help='Stop linting once this many errors have been reported')
+    parser.add_argument('--max-file-size', metavar='BYTES', type=int,
+                        help='Skip files larger than this many bytes and report them as FILE_TOO_LARGE errors '
+                        '(e.g. to avoid running out of memory on huge generated files)')
+    parser.add_argument('--timeout', metavar='SECONDS', type=float,
+                        help='Stop linting any file which takes longer than this many seconds and report it as a '
+                        'TIMEOUT error, other files are still linted')
+    parser.add_argument('--transforms', default=TRANSFORMS_ALL, type=str,
+                        help='Transforms to apply after parsing. Either a preset ({presets}) or a comma-separated '
+                        'list of transform class names (default: "{default}")'
+                        .format(presets=', '.join(TRANSFORM_PRESETS), default=TRANSFORMS_ALL))
+    parser.add_argument('--skip-transform', dest='skip_transforms', action='append', metavar='TRANSFORM',
+                        help='Transform class name to skip, can be repeated (e.g. "SmartQuotes")')
+    parser.add_argument('--include', action='append', metavar='GLOB',
+                        help='Glob of additional files to lint in directories, can be repeated (e.g. "*.txt"). '
+                        'Globs with a "/" match paths relative to each directory, others match file names')
+    parser.add_argument('--exclude', action='append', metavar='GLOB',
+                        help='Glob of files or directories to skip, can be repeated (e.g. "docs/_templates")')
+    parser.add_argument('--changed-since', metavar='REF', type=str,
+                        help='Only lint reST files changed since a git ref (e.g. "origin/main"), '
+                        'paths limit which changed files are linted')
+    parser.add_argument('--staged', action='store_true',
+                        help='Only lint reST files with changes staged in git, paths limit which staged files are '
+                        'linted')
+    parser.add_argument('--stats', action='store_true',
+                        help='Print a summary of the run (files, bytes, docs/sec, and errors per level and type) to '
+                        'stderr')
+    parser.add_argument('--report-file', metavar='PATH', type=str,
+                        help='Write a JSON report of the run to a file, including the duration, size, and errors '
+                        'per level and type of each file')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print the slowest files and time spent per phase to stderr (disables the cache)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and re-lint files as they change, printing new (+) and resolved (-) errors')
+    parser.add_argument('--watch-interval', default=WATCH_INTERVAL, type=float,
+                        help='Seconds between checks for changes when inotify is unavailable (default: {default})'
+                        .format(default=WATCH_INTERVAL))
+    parser.add_argument('--serve', action='store_true',
+                        help='Run a long-lived lint server speaking JSON-RPC over stdin/stdout (or `--socket`)')
+    parser.add_argument('--socket', type=str,
+                        help='Unix socket path for `--serve` to listen on (pair with `rst-lint-client`)')
+    return parser
+
+
+def _parse_transforms(transforms):
+    """Convert any non-preset `--transforms` into a list of class names"""
+    if transforms in TRANSFORM_PRESETS:
+        return transforms
+    return [name.strip() for name in transforms.split(',') if name.strip()]
+
+
+def _run(argv=None, stream=sys.stdout, allow_long_running=True):
+    """Parse our command line arguments and run `rst-lint` with them
+
+    :param bool allow_long_running: Allow modes which run until they're stopped (e.g. `--serve`, `--watch`).
+        Disabled when running on behalf of `rst-lint-client`
+    """
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    if not allow_long_running and (args.serve or args.socket or args.watch):
+        parser.error('--serve, --socket, and --watch cannot be used via rst-lint-client')
+
+    # If we're running as a server, then hand off to it
+    serve = args.__dict__.pop('serve')
+    socket_path = args.__dict__.pop('socket')
+    if serve:
+        # DEV: We load our server lazily since most runs never need it
+        from restructuredtext_lint.server import serve_socket, serve_stdio
+        if socket_path:
+            serve_socket(socket_path)
+        else:
+            serve_stdio()
+        return
+    # If we're watching our files, then hand off to our watcher
+    watch = args.__dict__.pop('watch')
+    watch_interval = args.__dict__.pop('watch_interval')
+    if watch:
+        if args.changed_since or args.staged or args.profile or args.report_file or args.format == 'json':
+            parser.error('--watch cannot be used with --changed-since, --staged, --profile, --report-file, '
+                         'or --format json')
+        # DEV: We load our watcher lazily since most runs never need it
+        from restructuredtext_lint.watch import watch as watch_paths
+        watch_paths(args.paths or [os.curdir], stream=stream, format=args.format, level=LEVEL_MAP[args.level],
+                    jobs=args.jobs, interval=watch_interval, include=args.include, exclude=args.exclude,
+                    rst_prolog=args.rst_prolog, transforms=_parse_transforms(args.transforms),
+                    skip_transforms=args.skip_transforms, max_file_size=args.max_file_size, timeout=args.timeout)
+        return
+
+    if not args.paths:
+        # DEV: When linting changed files, we default to every changed file within our current directory
+        if args.changed_since or args.staged:
+            args.paths = [os.curdir]
+        else:
+            parser.error('the following arguments are required: path')
 
     # Convert our level from string to number for `_main`
     args.level = LEVEL_MAP[args.level]
 
+    # Convert any non-preset transforms into a list of class names
+    args.transforms = _parse_transforms(args.transforms)
+
     # Run the main argument
-    _main(**args.__dict__)
+    _main(stream=stream, **args.__dict__)
+
+
+def main():
+    _run()
 
 
 if __name__ == '__main__':
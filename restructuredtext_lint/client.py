@@ -0,0 +1,47 @@
+# Load in our dependencies
+# DEV: This module is intentionally lightweight (no `docutils`) so each call only pays for a socket round trip
+from __future__ import absolute_import
+import json
+import os
+import socket
+import sys
+
+
+def request(socket_path, method, params=None):
+    """Send a single JSON-RPC request to an `rst-lint --serve --socket` server and return its result"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        payload = {'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params or {}}
+        sock.sendall((json.dumps(payload) + '\n').encode('utf-8'))
+        with sock.makefile('rb') as sock_file:
+            response = json.loads(sock_file.readline().decode('utf-8'))
+    finally:
+        sock.close()
+
+    if 'error' in response:
+        raise RuntimeError('rst-lint server error: {message}'.format(message=response['error']['message']))
+    return response['result']
+
+
+def main():
+    # DEV: We avoid `argparse` for our own option so every other argument is forwarded as-is to the server
+    argv = sys.argv[1:]
+    if len(argv) < 2 or argv[0] != '--socket':
+        sys.stderr.write('usage: rst-lint-client --socket SOCKET [rst-lint arguments ...]\n')
+        sys.exit(1)
+    socket_path, args = argv[1], argv[2:]
+
+    try:
+        result = request(socket_path, 'run', {'args': args, 'cwd': os.getcwd()})
+    # DEV: A `ValueError` means our server closed our connection without replying (e.g. it was stopped)
+    except (OSError, RuntimeError, ValueError) as exc:
+        sys.stderr.write('Unable to lint via "{socket_path}": {exc}\n'.format(socket_path=socket_path, exc=exc))
+        sys.exit(1)
+    sys.stdout.write(result['stdout'])
+    sys.stderr.write(result['stderr'])
+    sys.exit(result['exit_code'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+# Load in our dependencies
+from __future__ import absolute_import
+import fnmatch
+import io
+import os
+import re
+import subprocess
+
+# Define constants
+DEFAULT_INCLUDE = ('*.rst', '*.rest')
+# DEV: These directories never hold documents we want to lint and can be enormous (e.g. `node_modules`)
+DEFAULT_EXCLUDED_DIRS = frozenset((
+    '.git', '.hg', '.svn', '.tox', '.nox', '.eggs', '.mypy_cache', '.pytest_cache', '__pycache__',
+    '.venv', 'venv', 'node_modules', 'site-packages', '_build',
+))
+# DEV: Virtualenvs can have any name so we also look for the marker files they're created with
+VENV_MARKERS = ('pyvenv.cfg', 'conda-meta')
+GITIGNORE_FILENAME = '.gitignore'
+
+
+def _translate_gitignore_glob(pattern):
+    """Translate a `.gitignore` glob into a regular expression matching slash-separated paths"""
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            regex += '(?:.*/)?'
+            i += 3
+        elif pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+        elif char == '*':
+            regex += '[^/]*'
+            i += 1
+        elif char == '?':
+            regex += '[^/]'
+            i += 1
+        elif char == '[' and ']' in pattern[i + 2:]:
+            end = pattern.index(']', i + 2)
+            contents = pattern[i + 1:end]
+            if contents.startswith('!'):
+                contents = '^' + contents[1:]
+            regex += '[' + contents.replace('\\', '\\\\') + ']'
+            i = end + 1
+        elif char == '\\' and i + 1 < len(pattern):
+            regex += re.escape(pattern[i + 1])
+            i += 2
+        else:
+            regex += re.escape(char)
+            i += 1
+    return re.compile(regex + r'\Z')
+
+
+class _GitignoreRule(object):
+    """Single pattern from a `.gitignore` file"""
+    __slots__ = ('base_dir', 'regex', 'negate', 'dir_only', 'anchored')
+
+    def __init__(self, base_dir, pattern):
+        self.base_dir = base_dir
+        self.negate = pattern.startswith('!')
+        if self.negate:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        # DEV: Patterns with a slash (other than a trailing one) are relative to their `.gitignore`,
+        #      otherwise they match a name at any depth
+        self.anchored = '/' in pattern
+        self.regex = _translate_gitignore_glob(pattern.lstrip('/'))
+
+    def matches(self, path, is_dir):
+        """Determine if an absolute path matches our rule"""
+        if self.dir_only and not is_dir:
+            return False
+        if not path.startswith(self.base_dir):
+            return False
+        if self.anchored:
+            relative_path = path[len(self.base_dir):]
+            if os.sep != '/':
+                relative_path = relative_path.replace(os.sep, '/')
+            return self.regex.match(relative_path) is not None
+        return self.regex.match(os.path.basename(path)) is not None
+
+
+def _load_gitignore(dirpath):
+    """Load the rules from a directory's `.gitignore` (if any)"""
+    try:
+        with io.open(os.path.join(dirpath, GITIGNORE_FILENAME), encoding='utf-8', errors='replace') as f:
+            lines = f.read().splitlines()
+    except (IOError, OSError):
+        return []
+
+    rules = []
+    base_dir = os.path.join(dirpath, '')
+    for line in lines:
+        # DEV: Trailing spaces are ignored unless they're escaped
+        if not line.endswith('\\ '):
+            line = line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+        rules.append(_GitignoreRule(base_dir, line))
+    return rules
+
+
+def _is_gitignored(rules, path, is_dir):
+    """Determine if a path is ignored, later rules (e.g. from deeper `.gitignore` files) take precedence"""
+    ignored = False
+    for rule in rules:
+        if rule.matches(path, is_dir):
+            ignored = not rule.negate
+    return ignored
+
+
+def _parent_gitignore_rules(dirpath):
+    """Load `.gitignore` rules from the parents of a directory, up to its repository's root"""
+    parents = []
+    parent = dirpath
+    while True:
+        if os.path.exists(os.path.join(parent, '.git')):
+            break
+        next_parent = os.path.dirname(parent)
+        if next_parent == parent:
+            # DEV: We're not inside of a repository so parent `.gitignore` files don't apply
+            return []
+        parent = next_parent
+        parents.append(parent)
+
+    rules = []
+    for parent in reversed(parents):
+        rules.extend(_load_gitignore(parent))
+    return rules
+
+
+def _matches_globs(relative_path, globs):
+    """Determine if a slash-separated path relative to its search root matches any of our globs
+
+    Globs with a slash are matched against the entire relative path, otherwise they are matched against its name
+    """
+    name = relative_path.rsplit('/', 1)[-1]
+    for glob in globs:
+        if fnmatch.fnmatchcase(relative_path if '/' in glob else name, glob):
+            return True
+    return False
+
+
+def _is_venv(dirpath):
+    return any(os.path.exists(os.path.join(dirpath, marker)) for marker in VENV_MARKERS)
+
+
+def iter_directory_files(root, include=None, exclude=None, gitignore=True, directories=None):
+    """Yield files to lint within a directory, pruning excluded directories before descending into them
+
+    :param string root: Directory to search
+    :param list include: Globs of additional files to lint, on top of `DEFAULT_INCLUDE`
+    :param list exclude: Globs of files and directories to skip
+    :param bool gitignore: Skip files and directories ignored by `.gitignore` files
+    :param list directories: Optional list to append each searched directory to (e.g. to watch them)
+    :rtype generator: Generator of file paths, files within a directory are yielded before its subdirectories
+    """
+    include = DEFAULT_INCLUDE + tuple(include or ())
+    exclude = tuple(exclude or ())
+    abs_root = os.path.abspath(root)
+    base_rules = _parent_gitignore_rules(abs_root) if gitignore else []
+
+    # DEV: We walk depth-first with our own stack so we can prune directories and carry `.gitignore` rules down
+    stack = [(root, '', base_rules)]
+    while stack:
+        dirpath, relative_dirpath, rules = stack.pop()
+        abs_dirpath = os.path.join(abs_root, relative_dirpath)
+        if gitignore:
+            rules = rules + _load_gitignore(abs_dirpath)
+        try:
+            with os.scandir(dirpath) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            # DEV: Like `os.walk`, we skip directories we can't read
+            continue
+        if directories is not None:
+            directories.append(dirpath)
+
+        subdirs = []
+        for entry in entries:
+            relative_path = relative_dirpath + entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                # DEV: Like `os.walk`, we don't follow symlinks to directories (e.g. `loop -> ..` would never end).
+                #      Unlike files, they're skipped entirely
+                if not is_dir and entry.is_symlink() and entry.is_dir():
+                    continue
+            except OSError:
+                continue
+            if is_dir:
+                if entry.name in DEFAULT_EXCLUDED_DIRS or _matches_globs(relative_path, exclude):
+                    continue
+                abs_path = os.path.join(abs_dirpath, entry.name)
+                if (rules and _is_gitignored(rules, abs_path, True)) or _is_venv(abs_path):
+                    continue
+                subdirs.append((entry.path, relative_path + '/', rules))
+            elif _matches_globs(relative_path, include) and not _matches_globs(relative_path, exclude):
+                if rules and _is_gitignored(rules, os.path.join(abs_dirpath, entry.name), False):
+                    continue
+                yield entry.path
+
+        # DEV: We push in reverse so our subdirectories are visited in sorted order
+        stack.extend(reversed(subdirs))
+
+
+def iter_files(paths, include=None, exclude=None, gitignore=True, directories=None):
+    """Yield files to lint from files and directories
+
+    Files are always yielded, directories are searched via `iter_directory_files`
+
+    :param list paths: Files and directories to lint
+    :param list directories: Optional list to append each searched directory (and each file's directory) to
+    :rtype generator: Generator of file paths
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for filepath in iter_directory_files(path, include=include, exclude=exclude, gitignore=gitignore,
+                                                 directories=directories):
+                yield filepath
+        else:
+            if directories is not None:
+                directories.append(os.path.dirname(path) or os.curdir)
+            yield path
+
+
+def _git(args, cwd=None):
+    """Run a `git` command and return its stdout
+
+    :raises RuntimeError: If `git` is missing or the command fails
+    """
+    try:
+        process = subprocess.run(('git',) + tuple(args), cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as exc:
+        raise RuntimeError('Unable to run git: {exc}'.format(exc=exc))
+    if process.returncode != 0:
+        raise RuntimeError('git {command} failed: {stderr}'.format(
+            command=' '.join(args), stderr=process.stderr.decode('utf-8', 'replace').strip()))
+    return process.stdout.decode('utf-8')
+
+
+def git_changed_files(changed_since=None, staged=False, cwd=None, include=None, exclude=None):
+    """List reST files changed according to `git diff --name-only`
+
+    :param string changed_since: Ref to compare our working tree (or index if `staged`) against (e.g. `origin/main`)
+    :param bool staged: Only consider changes staged in our index
+    :param string cwd: Directory inside of our repository (default: current working directory)
+    :param list include: Globs of additional files to lint, on top of `DEFAULT_INCLUDE`
+    :param list exclude: Globs of files and directories to skip, relative to our repository's root
+    :rtype list: Absolute paths to changed files which still exist, in `git's` order
+    """
+    include = DEFAULT_INCLUDE + tuple(include or ())
+    exclude = tuple(exclude or ())
+    cwd = os.path.abspath(cwd or os.getcwd())
+    toplevel = _git(('rev-parse', '--show-toplevel'), cwd=cwd).strip()
+
+    # DEV: `-z` avoids `git` quoting unusual filenames and `--diff-filter=d` leaves out deleted files
+    args = ['diff', '--name-only', '-z', '--diff-filter=d']
+    if staged:
+        args.append('--cached')
+    if changed_since:
+        # DEV: `--` separates our ref from paths so a missing ref fails loudly instead of being treated as a path
+        args.append(changed_since)
+    args.append('--')
+
+    filepaths = []
+    for name in _git(args, cwd=cwd).split('\0'):
+        if not name or not _matches_globs(name, include):
+            continue
+        # DEV: Excluded directories apply to any of a file's parents
+        parts = name.split('/')
+        if any(_matches_globs('/'.join(parts[:i + 1]), exclude) for i in range(len(parts))):
+            continue
+        filepath = os.path.join(toplevel, name)
+        if os.path.isfile(filepath):
+            filepaths.append(filepath)
+    return filepaths
+
+
+def filter_to_scope(filepaths, scope_paths):
+    """Filter absolute filepaths to those matching or inside of any of our scope paths
+
+    :param list filepaths: Absolute paths to filter
+    :param list scope_paths: Files or directories to keep paths for
+    :rtype list: Matching paths, relative to our current working directory
+    """
+    # DEV: We resolve symlinks on both sides since `git rev-parse --show-toplevel` always returns a real path
+    scopes = [os.path.realpath(scope_path) for scope_path in scope_paths]
+    filtered_filepaths = []
+    for filepath in filepaths:
+        real_filepath = os.path.realpath(filepath)
+        if any(real_filepath == scope or real_filepath.startswith(scope.rstrip(os.sep) + os.sep) for scope in scopes):
+            filtered_filepaths.append(os.path.relpath(real_filepath))
+    return filtered_filepaths
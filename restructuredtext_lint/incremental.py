@@ -0,0 +1,354 @@
+# Load in our dependencies
+from __future__ import absolute_import
+import bisect
+from collections import Counter
+import re
+
+from restructuredtext_lint.lint import _get_thread_linter, _iter_nodes, DEFAULT_LEVEL, LintError, TRANSFORMS_NONE
+
+# Define constants
+# DEV: Section adornments are lines of a single repeated punctuation character, same as `docutils`
+ADORNMENT_RE = re.compile(r'([!-/:-@\[-`{-~])\1* *$')
+# DEV: `docutils` converts these to spaces before splitting lines, we do the same so our line numbers match
+WHITESPACE_RE = re.compile(r'[\v\f]')
+# DEV: Underlines shorter than this (and their title) aren't sections, they're "possible title underlines"
+MIN_UNDERLINE_LENGTH = 4
+# DEV: Each chunk costs ~2ms to set up for parsing so we group small sections together
+MIN_CHUNK_LINES = 200
+CONTEXT_TITLE = 'restructuredtext-lint-context'
+# Nodes which take part in checks across sections (e.g. references, targets, substitutions, footnotes)
+CROSS_SECTION_TAGNAMES = frozenset((
+    'citation', 'citation_reference', 'footnote', 'footnote_reference', 'pending', 'reference', 'section',
+    'substitution_definition', 'substitution_reference', 'target',
+))
+CROSS_SECTION_ATTRIBUTES = ('names', 'dupnames', 'refname', 'refuri', 'refid', 'anonymous', 'auto')
+# DEV: Registering names (e.g. targets, substitutions) reports errors which depend on every earlier name in our
+#      document, so we only take them from our full lint
+CROSS_SECTION_MESSAGE_RE = re.compile(
+    r'Duplicate (?:ID|name|explicit target name|implicit target name|substitution definition name)\b')
+
+
+def _split_lines(content):
+    return WHITESPACE_RE.sub(' ', content).splitlines()
+
+
+def _find_headers(lines):
+    """Find section headers in our lines
+
+    :rtype list: List of `(line index, style)` tuples where `style` is an `(overline, underline)` tuple
+    """
+    headers = []
+    previous_blank = True
+    i = 0
+    while i < len(lines) - 1:
+        line = lines[i].rstrip()
+        if previous_blank and line and not line[0].isspace():
+            next_line = lines[i + 1].rstrip()
+            if ADORNMENT_RE.match(line):
+                # Overline, title, and underline
+                underline = lines[i + 2].rstrip() if i + 2 < len(lines) else ''
+                if next_line.strip() and underline[:1] == line[0] and ADORNMENT_RE.match(underline):
+                    headers.append((i, (line[0], line[0])))
+                    i += 3
+                    previous_blank = False
+                    continue
+            elif ADORNMENT_RE.match(next_line) and \
+                    (len(next_line) >= len(line) or len(next_line) >= MIN_UNDERLINE_LENGTH):
+                # Title and underline
+                headers.append((i, ('', next_line[0])))
+                i += 2
+                previous_blank = False
+                continue
+        previous_blank = not line
+        i += 1
+    return headers
+
+
+def _split_sections(lines, min_chunk_lines=MIN_CHUNK_LINES):
+    """Split our lines into chunks at section boundaries
+
+    We split on the shallowest section level with more than one section (e.g. our top-level sections,
+    or the sections under our document's title). Consecutive sections are grouped until they reach
+    `min_chunk_lines` since each chunk has a fixed parsing overhead
+
+    :rtype list: List of `(start index, end index, context)` tuples where `context` describes
+        the section styles seen before our chunk and the section level our chunk starts at
+    """
+    # Assign each header its level, same as `docutils` (`RSTState.check_subsection`)
+    # DEV: Headers which skip levels aren't sections, they don't add their style nor change our level
+    styles = []
+    current_level = 0
+    sections = []
+    for start, style in _find_headers(lines):
+        context = (tuple(styles), current_level)
+        if style in styles:
+            level = styles.index(style) + 1
+            if level > current_level + 1:
+                continue
+        elif len(styles) == current_level:
+            styles.append(style)
+            level = len(styles)
+        else:
+            continue
+        sections.append((start, level, context))
+        current_level = level
+    counts = Counter(level for _, level, _ in sections)
+    split_level = next((level for level in range(1, len(styles) + 1) if counts[level] > 1), None)
+
+    chunks = []
+    chunk_start = 0
+    context = ((), 0)
+    for start, level, section_context in sections:
+        if level == split_level and start > 0 and start - chunk_start >= min_chunk_lines:
+            chunks.append((chunk_start, start, context))
+            chunk_start = start
+            context = section_context
+    chunks.append((chunk_start, len(lines), context))
+    return chunks
+
+
+def _context_prolog(context):
+    """Build reStructuredText which sets up the same section styles and level as where our chunk started"""
+    styles, level = context
+    titles = list(styles)
+    # DEV: Our titles nest down to the deepest style, so close back out to the level our chunk started at
+    if 0 < level < len(styles):
+        titles.append(styles[level - 1])
+    parts = []
+    for overline, underline in titles:
+        title = CONTEXT_TITLE
+        if overline:
+            title = overline * len(CONTEXT_TITLE) + '\n' + title
+        parts.append(title + '\n' + underline * len(CONTEXT_TITLE) + '\n')
+    return '\n'.join(parts)
+
+
+def _node_line(node):
+    while node is not None and node.line is None:
+        node = node.parent
+    return node.line if node is not None else None
+
+
+def _freeze(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _cross_section_entries(document, line_offset):
+    """Summarize the nodes in a chunk which take part in cross-section checks
+
+    :rtype tuple: `(entries, entry lines)` tuple. Entries are independent of line numbers so editing
+        a section without touching its names or references keeps the same entries
+    """
+    entries = []
+    entry_lines = []
+    for node in _iter_nodes(document):
+        if node.tagname not in CROSS_SECTION_TAGNAMES:
+            continue
+        line = _node_line(node)
+        if line is not None:
+            line -= line_offset
+            # DEV: Skip anything from our prolog (e.g. context sections)
+            if line <= 0:
+                continue
+        attributes = tuple((name, _freeze(node[name])) for name in CROSS_SECTION_ATTRIBUTES if node.get(name))
+        if node.tagname == 'substitution_definition':
+            attributes += (('text', node.astext()),)
+        elif node.tagname == 'pending':
+            attributes += (('transform', node.transform.__module__, node.transform.__name__),
+                           ('details', repr([(key, node.details[key]) for key in sorted(node.details)])))
+        entries.append((node.tagname, attributes))
+        entry_lines.append(line)
+    return tuple(entries), entry_lines
+
+
+def _shift_error(error, offset, source):
+    line = error.line + offset if error.line is not None else None
+    return LintError(line, source, error.level, error.type, error.message, error._details)
+
+
+def _error_key(error):
+    return (error.line, error.level, error.message)
+
+
+class _Section(object):
+    """Cached lint results for a single chunk of a document"""
+    __slots__ = ('text', 'errors', 'entries', 'entry_lines')
+
+    def __init__(self, text, errors, entries, entry_lines):
+        self.text = text
+        self.errors = errors
+        self.entries = entries
+        self.entry_lines = entry_lines
+
+
+class IncrementalLinter(object):
+    """Linter for a single document which is linted repeatedly as it's edited (e.g. in an editor)
+
+    Our document is split into sections. Only sections whose text changed are parsed again, the rest reuse their
+    cached errors with their line numbers shifted. Checks across sections (e.g. references, duplicate targets,
+    substitutions) are run over the entire document whenever a section's names or references change.
+    Otherwise, their errors are reused as well.
+
+    Errors are `LintError` records sorted by line.
+
+    :param string rst_prolog: Optional content to prepend to our document
+    :param int level: Minimum error level to collect, lower level errors are ignored
+    :param Linter linter: Optional `Linter` to lint with (default: our shared default `Linter`)
+    :param int min_section_lines: Minimum lines per section, smaller sections are grouped with their neighbors
+    """
+    def __init__(self, rst_prolog=None, level=DEFAULT_LEVEL, linter=None, min_section_lines=MIN_CHUNK_LINES):
+        self.rst_prolog = rst_prolog
+        self.level = level
+        self.linter = linter
+        self.min_section_lines = min_section_lines
+        # DEV: Keyed by `(context, text)` and only holds the sections from our last lint
+        self._sections = {}
+        self._cross_entries = None
+        self._cross_texts = None
+        self._cross_errors = []
+        self._dropped_errors = []
+
+        # Expose what our last lint did (e.g. for tests and editor status bars)
+        self.reparsed_count = 0
+        self.full_lint = False
+
+    def lint(self, content, filepath=None):
+        """Lint the latest content of our document
+
+        :param string content: reStructuredText to be linted
+        :param string filepath: Optional path to file, this will be returned as the source
+        :rtype list: List of `LintError` records sorted by line
+        """
+        linter = self.linter or _get_thread_linter()
+        lines = _split_lines(content)
+
+        # Lint any sections which changed since last time
+        self.reparsed_count = 0
+        self.full_lint = False
+        sections = {}
+        chunk_sections = []
+        starts = []
+        for start, end, context in _split_sections(lines, self.min_section_lines):
+            text = '\n'.join(lines[start:end]) + '\n'
+            key = (context, text)
+            section = sections.get(key) or self._sections.get(key)
+            if section is None:
+                section = self._lint_section(linter, context, text)
+                self.reparsed_count += 1
+            sections[key] = section
+            chunk_sections.append(section)
+            starts.append(start)
+        self._sections = sections
+
+        section_errors = []
+        for chunk_index, (start, section) in enumerate(zip(starts, chunk_sections)):
+            section_errors.extend((chunk_index, _shift_error(error, start, filepath)) for error in section.errors)
+
+        # Reuse our cross-section errors if nothing they depend on changed, otherwise lint our entire document
+        result = self._reuse_cross_errors(section_errors, chunk_sections, starts, filepath)
+        if result is None:
+            full_errors = linter.lint(content, filepath, rst_prolog=self.rst_prolog, level=self.level, compact=True)
+            result = self._save_cross_errors(full_errors, section_errors, chunk_sections, starts)
+            self.full_lint = True
+        errors, cross_errors = result
+        errors.extend(cross_errors)
+
+        # DEV: Errors without a line (e.g. anonymous hyperlink mismatches) go last
+        errors.sort(key=lambda error: (error.line is None, error.line or 0))
+        return errors
+
+    def _lint_section(self, linter, context, text):
+        """Parse a single section on its own, in the same context as it has in our document"""
+        prolog = _context_prolog(context)
+        if self.rst_prolog:
+            prolog = self.rst_prolog + '\n' + prolog if prolog else self.rst_prolog
+        # DEV: Our prolog may be prepended or reused as parsed nodes, so we use the line offset our `Linter` applied
+        errors, document, line_offset = linter._lint(text, rst_prolog=prolog, level=self.level,
+                                                     transforms=TRANSFORMS_NONE, compact=True)
+        entries, entry_lines = _cross_section_entries(document, line_offset)
+        # DEV: Errors from our prolog are reported by our full lint, only once
+        errors = [error for error in errors if (error.line is None or error.line > 0) and
+                  not CROSS_SECTION_MESSAGE_RE.match(error.message)]
+        return _Section(text, errors, entries, entry_lines)
+
+    def _save_cross_errors(self, full_errors, section_errors, chunk_sections, starts):
+        """Find errors from our full lint which our sections didn't report and anchor them for reuse
+
+        Section errors which our full lint didn't report (e.g. they depend on another section) are dropped
+
+        :param list section_errors: List of `(chunk index, error)` tuples
+        :rtype tuple: `(section errors, cross-section errors)` tuple
+        """
+        full_remaining = Counter(_error_key(error) for error in full_errors)
+        errors = []
+        self._dropped_errors = []
+        for chunk_index, error in section_errors:
+            key = _error_key(error)
+            if full_remaining[key]:
+                full_remaining[key] -= 1
+                errors.append(error)
+            else:
+                relative_line = error.line - starts[chunk_index] if error.line is not None else None
+                self._dropped_errors.append((chunk_index, relative_line, error.level, error.message))
+
+        remaining = Counter(_error_key(error) for error in errors)
+        cross_errors = []
+        self._cross_errors = []
+        for error in full_errors:
+            key = _error_key(error)
+            if remaining[key]:
+                remaining[key] -= 1
+                continue
+            cross_errors.append(error)
+
+            # Anchor our error to the node which caused it, or its section's text if we can't find one
+            anchor = None
+            if error.line is not None and error.line > 0:
+                chunk_index = bisect.bisect_right(starts, error.line - 1) - 1
+                relative_line = error.line - starts[chunk_index]
+                entry_lines = chunk_sections[chunk_index].entry_lines
+                entry_index = entry_lines.index(relative_line) if relative_line in entry_lines else None
+                anchor = (chunk_index, entry_index, relative_line)
+            self._cross_errors.append((anchor, _shift_error(error, 0, None)))
+
+        self._cross_entries = tuple(section.entries for section in chunk_sections)
+        self._cross_texts = [section.text for section in chunk_sections]
+        return errors, cross_errors
+
+    def _reuse_cross_errors(self, section_errors, chunk_sections, starts, filepath):
+        """Reuse our last cross-section errors with updated line numbers, and drop the same section errors as before
+
+        :param list section_errors: List of `(chunk index, error)` tuples
+        :returns: `(section errors, cross-section errors)` tuple or `None` if we need to lint our entire document
+        """
+        if self._cross_entries != tuple(section.entries for section in chunk_sections):
+            return None
+        dropped = Counter()
+        for chunk_index, relative_line, level, message in self._dropped_errors:
+            # DEV: If a section with a dropped error changed, then we can't tell if it still applies
+            if chunk_sections[chunk_index].text != self._cross_texts[chunk_index]:
+                return None
+            line = starts[chunk_index] + relative_line if relative_line is not None else None
+            dropped[(line, level, message)] += 1
+        errors = []
+        for _, error in section_errors:
+            key = _error_key(error)
+            if dropped[key]:
+                dropped[key] -= 1
+                continue
+            errors.append(error)
+
+        cross_errors = []
+        for anchor, error in self._cross_errors:
+            if anchor is None:
+                cross_errors.append(_shift_error(error, 0, filepath))
+                continue
+            chunk_index, entry_index, relative_line = anchor
+            section = chunk_sections[chunk_index]
+            if entry_index is not None:
+                relative_line = section.entry_lines[entry_index]
+            elif section.text != self._cross_texts[chunk_index]:
+                return None
+            line = starts[chunk_index] + relative_line
+            cross_errors.append(LintError(line, filepath, error.level, error.type, error.message, error._details))
+        return errors, cross_errors
@@ -0,0 +1,176 @@
+# Load in our dependencies
+from __future__ import absolute_import
+import contextlib
+import inspect
+import io
+import json
+import os
+import socketserver
+import stat
+import sys
+
+from restructuredtext_lint import cli
+from restructuredtext_lint.lint import _get_default_linter
+
+# Define our JSON-RPC 2.0 error codes
+# https://www.jsonrpc.org/specification#error_object
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class LintServer(object):
+    """Long-lived lint server which keeps a warm `Linter` between requests
+
+    Requests and responses are JSON-RPC 2.0 objects, one per line. Supported methods are:
+
+    - `lint` - Lint a string, params are `content`, `filepath`, and `rst_prolog`. Returns a list of error dicts
+    - `lint_file` - Lint a file, params are `filepath` and `rst_prolog`. Returns a list of error dicts
+    - `run` - Run `rst-lint` with `args` (list of CLI arguments) inside of `cwd`.
+      Returns `exit_code`, `stdout`, and `stderr` (used by `rst-lint-client`)
+    - `shutdown` - Stop the server
+    """
+    def __init__(self):
+        # DEV: We share the default linter so `run` requests (which use `lint_file`) are warm as well
+        self.linter = _get_default_linter()
+        self.shutdown_requested = False
+        self.methods = {
+            'lint': self.lint,
+            'lint_file': self.lint_file,
+            'run': self.run,
+            'shutdown': self.shutdown,
+        }
+
+    def lint(self, content, filepath=None, rst_prolog=None):
+        return [cli._error_to_dict(error) for error in self.linter.lint(content, filepath, rst_prolog=rst_prolog)]
+
+    def lint_file(self, filepath, rst_prolog=None):
+        return [cli._error_to_dict(error) for error in self.linter.lint_file(filepath, rst_prolog=rst_prolog)]
+
+    def run(self, args, cwd=None):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        exit_code = 0
+        original_cwd = os.getcwd()
+        try:
+            # DEV: We run requests one at a time so changing our working directory is safe
+            if cwd:
+                os.chdir(cwd)
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                # DEV: Long-running modes (e.g. `--watch`) would never reply and block every other client
+                cli._run(args, stream=stdout, allow_long_running=False)
+        except SystemExit as exc:
+            if exc.code is None:
+                exit_code = 0
+            elif isinstance(exc.code, int):
+                exit_code = exc.code
+            else:
+                stderr.write('{code}\n'.format(code=exc.code))
+                exit_code = 1
+        finally:
+            os.chdir(original_cwd)
+        return {'exit_code': exit_code, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+
+    def shutdown(self):
+        self.shutdown_requested = True
+        return None
+
+    def handle_line(self, line):
+        """Handle a single JSON-RPC request line
+
+        :returns: Response line or `None` for notifications
+        """
+        try:
+            request = json.loads(line)
+        except ValueError as exc:
+            return self._error_response(None, PARSE_ERROR, 'Parse error: {exc}'.format(exc=exc))
+        if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+            return self._error_response(None, INVALID_REQUEST, 'Invalid request')
+
+        request_id = request.get('id')
+        method = self.methods.get(request['method'])
+        if method is None:
+            response = self._error_response(request_id, METHOD_NOT_FOUND,
+                                            'Method not found: {method}'.format(method=request['method']))
+        else:
+            params = request.get('params') or {}
+            args, kwargs = (params, {}) if isinstance(params, list) else ((), params)
+            try:
+                inspect.signature(method).bind(*args, **kwargs)
+            except TypeError as exc:
+                response = self._error_response(request_id, INVALID_PARAMS, str(exc))
+            else:
+                try:
+                    result = method(*args, **kwargs)
+                except Exception as exc:
+                    response = self._error_response(request_id, INTERNAL_ERROR, repr(exc))
+                else:
+                    response = json.dumps({'jsonrpc': '2.0', 'id': request_id, 'result': result})
+
+        # DEV: Requests without an `id` are notifications which receive no response
+        if 'id' not in request:
+            return None
+        return response
+
+    def _error_response(self, request_id, code, message):
+        return json.dumps({'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}})
+
+
+def serve_stdio(stdin=None, stdout=None):
+    """Serve JSON-RPC requests over stdin/stdout until `shutdown` or end of input"""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    server = LintServer()
+    for line in stdin:
+        if not line.strip():
+            continue
+        response = server.handle_line(line)
+        if response is not None:
+            stdout.write(response + '\n')
+            stdout.flush()
+        if server.shutdown_requested:
+            break
+
+
+class _SocketHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        lint_server = self.server.lint_server
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = lint_server.handle_line(line.decode('utf-8'))
+            if response is not None:
+                self.wfile.write((response + '\n').encode('utf-8'))
+                self.wfile.flush()
+            if lint_server.shutdown_requested:
+                break
+
+
+def serve_socket(socket_path):
+    """Serve JSON-RPC requests over a Unix socket until `shutdown`"""
+    # Clean up any socket left behind by a previous server
+    # DEV: We only remove sockets so a mistyped path can't delete someone's file
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        pass
+    else:
+        if not stat.S_ISSOCK(mode):
+            sys.stderr.write('Path "{socket_path}" already exists and is not a socket\n'.format(
+                socket_path=socket_path))
+            sys.exit(1)
+            return
+        os.remove(socket_path)
+
+    # DEV: We handle one connection at a time since a `Linter` is not thread-safe
+    server = socketserver.UnixStreamServer(socket_path, _SocketHandler)
+    server.lint_server = LintServer()
+    try:
+        while not server.lint_server.shutdown_requested:
+            server.handle_request()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
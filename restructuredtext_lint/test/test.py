@@ -1,12 +1,28 @@
 # Load in our dependencies
 from __future__ import absolute_import
+import asyncio
+import io
+import json
 import os
+import shutil
+import signal
+import socket
 import subprocess
 import sys
+import tempfile
 import textwrap
-from unittest import TestCase
+import threading
+import time
+from concurrent.futures import BrokenExecutor
+from unittest import TestCase, skipUnless
 
 import restructuredtext_lint
+import restructuredtext_lint.cli
+from restructuredtext_lint.aio import alint, alint_files, AsyncLinter
+from restructuredtext_lint.cache import ResultCache
+from restructuredtext_lint.discovery import iter_directory_files
+from restructuredtext_lint.lint import _get_default_linter, _get_pool, _get_thread_linter
+from restructuredtext_lint.watch import InotifyWatcher, watch
 
 
 _dir = os.path.dirname(os.path.abspath(__file__))
@@ -15,14 +31,25 @@ warning_rst = os.path.join(_dir, 'test_files', 'second_short_heading.rst')
 dir_rst = os.path.join(_dir, 'test_files', 'dir')
 invalid_rst = os.path.join(_dir, 'test_files', 'invalid.rst')
 missing_rst = os.path.join(_dir, 'test_files', 'missing.rst')
+# DEV: Regression fixtures for content which is pathologically slow (or impossible) for `docutils` to parse
+slow_dir = os.path.join(_dir, 'test_files', 'slow')
+wide_grid_table_rst = os.path.join(slow_dir, 'wide_grid_table.rst')
+long_simple_table_rst = os.path.join(slow_dir, 'long_simple_table.rst')
+nested_block_quotes_rst = os.path.join(slow_dir, 'nested_block_quotes.rst')
 rst_lint_path = os.path.join(_dir, os.pardir, 'cli.py')
+rst_lint_client_path = os.path.join(_dir, os.pardir, 'client.py')
 
-"""
-# TODO: Implement this as a class (options) with a sugar function that lints a string against a set of options
-An invalid rst file
-    when linted with the `fail_first` parameter
-        raises on the first error
-"""
+
+def setUpModule():
+    # DEV: Our CLI caches by default, keep our tests (and their subprocesses) out of our real cache
+    global _cache_home
+    _cache_home = tempfile.mkdtemp()
+    os.environ['XDG_CACHE_HOME'] = _cache_home
+
+
+def tearDownModule():
+    del os.environ['XDG_CACHE_HOME']
+    shutil.rmtree(_cache_home)
 
 
 class TestRestructuredtextLint(TestCase):
@@ -143,6 +170,308 @@ class TestRestructuredtextLint(TestCase):
         # DEV: Without adjustments, this would be 6 due to empty lines in multiline strings
         self.assertEqual(errors[0].line, 3)
 
+    def test_rst_prolog_reuse(self):
+        """Reusing a parsed `rst-prolog` reports the same errors as prepending it to each document"""
+        rst_prolog = textwrap.dedent("""
+        .. |World| replace:: Moon
+        .. _unused: https://example.com/
+        .. _duplicate: https://example.com/a
+        .. role:: custom(emphasis)
+        .. default-role:: literal
+        """)
+        contents = (
+            'Hello\n==\n|World| :custom:`a` `b`\n',
+            '.. _duplicate: https://example.com/b\n\nduplicate_ unknown_ |Planet| [#]_\n\n.. [#] Note\n',
+            # DEV: Indented content continues our prolog's last block so it can't be parsed on its own
+            '   Indented |World|\n',
+        )
+        linter = restructuredtext_lint.Linter()
+        prepending_linter = restructuredtext_lint.Linter()
+        prepending_linter._get_parsed_prolog = lambda rst_prolog: None
+        for content in contents:
+            for compact in (False, True):
+                self.assertEqual(
+                    [(err.line, err.level, err.full_message)
+                     for err in linter.lint(content, rst_prolog=rst_prolog, compact=compact)],
+                    [(err.line, err.level, err.full_message)
+                     for err in prepending_linter.lint(content, rst_prolog=rst_prolog, compact=compact)])
+        self.assertIsNotNone(linter._get_parsed_prolog(rst_prolog))
+
+        # Prologs which depend on what follows them are always prepended
+        self.assertIsNone(linter._get_parsed_prolog('.. |World| replace:: Moon'))
+        self.assertIsNone(linter._get_parsed_prolog('Some text\n'))
+        self.assertIsNone(linter._get_parsed_prolog('Hello\n=====\n'))
+
+    def test_linter_reuse(self):
+        """A `Linter` can lint many documents with the same publisher and settings"""
+        linter = restructuredtext_lint.Linter()
+        for _ in range(3):
+            errors = linter.lint_file(invalid_rst)
+            self.assertEqual(len(errors), 1)
+            self.assertEqual(errors[0].line, 2)
+            self.assertEqual(errors[0].source, invalid_rst)
+            self.assertEqual(linter.lint(self._load_file(valid_rst)), [])
+
+    def test_lint_threads(self):
+        """`lint` can be called from many threads at once, each getting its own errors"""
+        from concurrent.futures import ThreadPoolExecutor
+        content = 'Hello\n====\n\nunknown_\n'
+        expected_errors = [(err.line, err.message) for err in restructuredtext_lint.lint(content, 'a.rst')]
+
+        def lint_many_times(i):
+            return [[(err.line, err.message) for err in restructuredtext_lint.lint(content, 'a.rst')]
+                    for _ in range(20)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lint_many_times, range(8)))
+        self.assertEqual(results, [[expected_errors] * 20] * 8)
+
+    def test_compact_errors(self):
+        """Compact errors match their `system_message` counterparts, including with `rst_prolog` offsets"""
+        for filepath in (invalid_rst, warning_rst, os.path.join(_dir, 'test_files', 'invalid_link.rst')):
+            errors = restructuredtext_lint.lint_file(filepath)
+            compact_errors = restructuredtext_lint.lint_file(filepath, compact=True)
+            self.assertEqual([(err.line, err.source, err.level, err.type, err.message, err.full_message)
+                              for err in errors],
+                             [(err.line, err.source, err.level, err.type, err.message, err.full_message)
+                              for err in compact_errors])
+            for error in compact_errors:
+                self.assertIsInstance(error, restructuredtext_lint.LintError)
+                self.assertFalse(hasattr(error, '__dict__'))
+
+        errors = restructuredtext_lint.lint('Hello\n==\n|World|\n', rst_prolog='.. |World| replace:: Moon\n',
+                                            compact=True)
+        self.assertEqual([error.line for error in errors], [2])
+
+    def test_compact_errors_parallel(self):
+        """Compact errors survive being sent between processes"""
+        results = restructuredtext_lint.lint_files([invalid_rst, invalid_rst], jobs=2, compact=True)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], restructuredtext_lint.lint_file(invalid_rst, compact=True))
+
+    def test_linter_rst_prolog_default(self):
+        """A `Linter` with an `rst_prolog` applies it to every document unless overridden"""
+        linter = restructuredtext_lint.Linter(rst_prolog='.. |World| replace:: Moon\n')
+        self.assertEqual(linter.lint('Hello |World|'), [])
+        errors = linter.lint('Hello |World|', rst_prolog='.. |Planet| replace:: Moon\n')
+        self.assertEqual(len(errors), 1)
+        self.assertIn('Undefined substitution referenced: "World"', errors[0].message)
+
+    def test_fail_first(self):
+        """An invalid rst file when linted with the `fail_first` parameter stops at the first error"""
+        filepath = os.path.join(_dir, 'test_files', 'invalid_link.rst')
+        self.assertEqual(len(restructuredtext_lint.lint_file(filepath)), 2)
+        errors = restructuredtext_lint.lint_file(filepath, fail_first=True)
+        self.assertEqual(len(errors), 1)
+        self.assertIn('Anonymous hyperlink mismatch', errors[0].message)
+
+    def test_max_errors_and_level(self):
+        """Only errors at or above `level` are collected and count towards `max_errors`"""
+        content = textwrap.dedent("""
+        Hello
+        ==
+
+        World
+        ====
+
+        Moon
+        ===
+
+        Stars
+        ====
+        """)
+        all_errors = restructuredtext_lint.lint(content)
+        self.assertEqual([error.level for error in all_errors], [1, 2, 1, 2])
+        errors = restructuredtext_lint.lint(content, level=2)
+        self.assertEqual([error.line for error in errors], [6, 12])
+        errors = restructuredtext_lint.lint(content, level=2, max_errors=1)
+        self.assertEqual([error.line for error in errors], [6])
+
+    def test_transforms_presets(self):
+        """Transform presets control which errors from transforms are reported"""
+        # DEV: "Unknown target name" comes from the `references` transforms, not our parser
+        filepath = os.path.join(_dir, 'test_files', 'invalid_target.rst')
+        self.assertIn('Unknown target name', restructuredtext_lint.lint_file(filepath)[0].message)
+        errors = restructuredtext_lint.lint_file(filepath, transforms='references-only')
+        self.assertIn('Unknown target name', errors[0].message)
+        self.assertEqual(restructuredtext_lint.lint_file(filepath, transforms='none'), [])
+
+        # Parsing errors are still reported without any transforms
+        errors = restructuredtext_lint.lint_file(invalid_rst, transforms='none')
+        self.assertEqual(errors[0].message, 'Title underline too short.')
+
+        with self.assertRaises(ValueError):
+            restructuredtext_lint.lint_file(invalid_rst, transforms='unknown')
+
+    def test_transforms_allow_and_deny_lists(self):
+        """Transforms can be allowed and skipped by class, class name, or dotted class path"""
+        from docutils.transforms.references import DanglingReferences
+        filepath = os.path.join(_dir, 'test_files', 'invalid_target.rst')
+        for allowed in (DanglingReferences, 'DanglingReferences', 'docutils.transforms.references.DanglingReferences'):
+            errors = restructuredtext_lint.lint_file(filepath, transforms=['SmartQuotes', allowed])
+            self.assertIn('Unknown target name', errors[0].message)
+            self.assertEqual(restructuredtext_lint.lint_file(filepath, skip_transforms=[allowed]), [])
+        errors = restructuredtext_lint.lint_file(filepath, transforms=['SmartQuotes', 'ExternalTargets'])
+        self.assertEqual(errors, [])
+
+    def test_profile(self):
+        """Linting with a `LintProfile` records time per phase and observer calls"""
+        profile = restructuredtext_lint.LintProfile()
+        restructuredtext_lint.lint_file(invalid_rst, profile=profile)
+        restructuredtext_lint.lint('Hello\n==\n', profile=profile)
+        self.assertEqual(profile.documents, 2)
+        self.assertEqual(profile.observer_calls, 2)
+        self.assertIn('read', profile.timings)
+        self.assertIn('parse', profile.timings)
+        self.assertIn('transform:DanglingReferences', profile.timings)
+        self.assertAlmostEqual(profile.total, sum(profile.timings.values()))
+
+    def test_iter_lint_files_with_profiles(self):
+        """Each file gets its own profile, even across processes"""
+        for jobs in (1, 2):
+            results = list(restructuredtext_lint.iter_lint_files([valid_rst, invalid_rst], jobs=jobs,
+                                                                 with_profiles=True))
+            self.assertEqual([(filepath, len(errors)) for filepath, errors, _ in results],
+                             [(valid_rst, 0), (invalid_rst, 1)])
+            for _, _, profile in results:
+                self.assertEqual(profile.documents, 1)
+                self.assertIn('parse', profile.timings)
+
+    def test_lint_files_parallel(self):
+        """Linting many files over a process pool returns the same errors in the same order as serially"""
+        filepaths = [invalid_rst, valid_rst, warning_rst, invalid_rst]
+        serial_results = restructuredtext_lint.lint_files(filepaths)
+        parallel_results = restructuredtext_lint.lint_files(filepaths, jobs=2)
+        self.assertEqual(len(parallel_results), len(filepaths))
+        for serial_errors, parallel_errors in zip(serial_results, parallel_results):
+            self.assertEqual([(err.line, err.source, err.message) for err in serial_errors],
+                             [(err.line, err.source, err.message) for err in parallel_errors])
+        self.assertEqual(parallel_results[1], [])
+        self.assertEqual(parallel_results[0][0].full_message, serial_results[0][0].full_message)
+
+    def test_iter_lint_files(self):
+        """Iterating over many files yields each file with its errors in order"""
+        results = restructuredtext_lint.iter_lint_files([valid_rst, invalid_rst])
+        self.assertEqual(next(results), (valid_rst, []))
+        filepath, errors = next(results)
+        self.assertEqual(filepath, invalid_rst)
+        self.assertEqual(errors[0].message, 'Title underline too short.')
+        with self.assertRaises(StopIteration):
+            next(results)
+
+    def test_lint_file_lines(self):
+        """Reading a file line by line reports the same errors as linting its content"""
+        content = ('Title\r\n===\r\n\r\n\tTabbed\x0cform feed\r\n\r\nSeparated\u2028line unknown_\r\n'
+                   '.. |a| replace:: A\n')
+        filepath = os.path.join(tempfile.mkdtemp(), 'lines.rst')
+        self.addCleanup(shutil.rmtree, os.path.dirname(filepath))
+        with io.open(filepath, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+        with io.open(filepath, encoding='utf-8') as f:
+            content = f.read()
+        for rst_prolog in (None, '.. |b| replace:: B\n', 'Unreusable prolog'):
+            errors = restructuredtext_lint.lint_file(filepath, rst_prolog=rst_prolog)
+            self.assertTrue(errors)
+            self.assertEqual([(err.line, err.source, err.full_message) for err in errors],
+                             [(err.line, err.source, err.full_message)
+                              for err in restructuredtext_lint.lint(content, filepath, rst_prolog=rst_prolog)])
+
+    def test_max_file_size(self):
+        """Files larger than `max_file_size` aren't read and report a single error instead"""
+        self.assertEqual(restructuredtext_lint.lint_file(invalid_rst, max_file_size=os.path.getsize(invalid_rst),
+                                                         compact=True),
+                         restructuredtext_lint.lint_file(invalid_rst, compact=True))
+        errors = restructuredtext_lint.lint_file(invalid_rst, max_file_size=10)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual((errors[0].line, errors[0].source, errors[0].level, errors[0].type),
+                         (None, invalid_rst, 4, 'FILE_TOO_LARGE'))
+        self.assertIn('larger than our maximum of 10 bytes', errors[0].message)
+
+    def test_timeout(self):
+        """Documents which take longer than `timeout` stop linting and report a `TIMEOUT` error"""
+        for filepath in (wide_grid_table_rst, long_simple_table_rst):
+            start = time.perf_counter()
+            errors = restructuredtext_lint.lint_file(filepath, timeout=0.05)
+            self.assertLess(time.perf_counter() - start, 0.5)
+            self.assertEqual([(err.line, err.source, err.level, err.type, err.message) for err in errors], [
+                (None, filepath, 4, 'TIMEOUT', 'Linting took longer than 0.05 seconds. Stopped linting it.'),
+            ])
+        self.assertEqual(signal.getsignal(signal.SIGALRM), signal.SIG_DFL)
+
+        # Our linter is unaffected by being interrupted
+        errors = restructuredtext_lint.lint_file(invalid_rst, timeout=5)
+        self.assertEqual([(err.line, err.message) for err in errors], [(2, 'Title underline too short.')])
+
+    def test_timeout_threads(self):
+        """Documents linted outside of our main thread also stop once they exceed their `timeout`"""
+        with open(long_simple_table_rst) as f:
+            documents = [('table.rst', f.read()), ('a.rst', 'Hello\n====\n')]
+        results = list(restructuredtext_lint.lint_many(documents, workers=2, pool='thread', timeout=0.05))
+        self.assertEqual([(name, [err.type for err in errors]) for name, errors in results],
+                         [('table.rst', ['TIMEOUT']), ('a.rst', ['WARNING'])])
+
+    def test_too_deeply_nested(self):
+        """Content nested too deeply for `docutils` to parse reports an error instead of raising"""
+        errors = restructuredtext_lint.lint_file(nested_block_quotes_rst)
+        self.assertEqual([(err.line, err.source, err.level, err.type) for err in errors],
+                         [(None, nested_block_quotes_rst, 4, 'TOO_DEEPLY_NESTED')])
+        self.assertEqual(restructuredtext_lint.lint_file(valid_rst), [])
+
+    def test_lint_many(self):
+        """Linting many documents yields each name with its errors in order, for every pool"""
+        documents = [('a.rst', 'Hello\n====\n'), ('b.rst', 'Hello\n=====\n'), ('c.rst', '|a|\n')]
+        for workers, pool in ((1, 'process'), (2, 'thread'), (2, 'process')):
+            results = list(restructuredtext_lint.lint_many(iter(documents), workers=workers, pool=pool,
+                                                           rst_prolog='.. |a| replace:: A\n'))
+            self.assertEqual([(name, [(err.line, err.source, err.message) for err in errors])
+                              for name, errors in results],
+                             [('a.rst', [(2, 'a.rst', 'Title underline too short.')]), ('b.rst', []), ('c.rst', [])])
+
+    def test_lint_many_threads_with_roles(self):
+        """Documents which register roles can be linted across threads at once"""
+        documents = [('doc{i}.rst'.format(i=i),
+                      ''.join('.. role:: role{i}x{j}(emphasis)\n\n:role{i}x{j}:`text`\n\n'.format(i=i, j=j)
+                              for j in range(20)) + 'Hello\n====\n')
+                     for i in range(32)]
+        results = list(restructuredtext_lint.lint_many(documents, workers=4, pool='thread'))
+        self.assertEqual([(name, [(err.line, err.message) for err in errors]) for name, errors in results],
+                         [(name, [(82, 'Title underline too short.')]) for name, _ in documents])
+        results = asyncio.run(self._alint_all(AsyncLinter(workers=4, pool='thread'), documents))
+        self.assertEqual([[(err.line, err.message) for err in errors] for errors in results],
+                         [[(82, 'Title underline too short.')]] * len(documents))
+
+    @staticmethod
+    async def _alint_all(async_linter, documents):
+        return await asyncio.gather(*(async_linter.lint(content, name) for name, content in documents))
+
+    def test_lint_many_reuses_pool(self):
+        """Our pools are built once and each thread lints with its own linter"""
+        documents = [('doc{i}.rst'.format(i=i), 'Hello\n====\n') for i in range(8)]
+        list(restructuredtext_lint.lint_many(documents, workers=2, pool='thread'))
+        pool = _get_pool('thread', 2)
+        list(restructuredtext_lint.lint_many(documents, workers=2, pool='thread'))
+        self.assertIs(_get_pool('thread', 2), pool)
+
+        linters = set(pool.map(lambda _: id(_get_thread_linter()), range(8)))
+        self.assertNotIn(id(_get_default_linter()), linters)
+
+    @skipUnless(hasattr(signal, 'SIGKILL'), 'Requires SIGKILL')
+    def test_broken_pool(self):
+        """A pool whose worker died (e.g. OOM killed) is replaced instead of failing every later call"""
+        documents = [('a.rst', 'Hello\n====\n')]
+        expected_errors = [[(2, 'Title underline too short.')]]
+        async_linter = AsyncLinter(workers=3)
+        for lint_all in (lambda: [errors for _, errors in restructuredtext_lint.lint_many(documents, workers=3)],
+                         lambda: asyncio.run(self._alint_all(async_linter, documents))):
+            pool = _get_pool('process', 3)
+            os.kill(pool.submit(os.getpid).result(), signal.SIGKILL)
+            # DEV: Depending on when our pool notices its dead worker, we either replace it up front or fail once
+            try:
+                lint_all()
+            except BrokenExecutor:
+                pass
+            self.assertEqual([[(err.line, err.message) for err in errors] for errors in lint_all()], expected_errors)
+            self.assertIsNot(_get_pool('process', 3), pool)
+
 
 class TestRestructuredtextLintCLI(TestCase):
     """ Tests for 'rst-lint' CLI command """
@@ -221,3 +550,762 @@ class TestRestructuredtextLintCLI(TestCase):
         # `check_output` doesn't raise an exception code so it's error code 0
         output = str(raw_output)
         self.assertEqual(output, '')
+
+    def test_jobs_matches_serial(self):
+        """Linting with `--jobs` produces the same output as linting serially"""
+        outputs = []
+        for jobs_args in ((), ('--jobs', '2')):
+            for format_args in (('--format', 'text'), ('--format', 'json')):
+                with self.assertRaises(subprocess.CalledProcessError) as e:
+                    subprocess.check_output((sys.executable, rst_lint_path) + jobs_args + format_args +
+                                            (invalid_rst, valid_rst, dir_rst, warning_rst),
+                                            universal_newlines=True)
+                self.assertEqual(e.exception.returncode, 2)
+                outputs.append(e.exception.output)
+        self.assertEqual(outputs[0], outputs[2])
+        self.assertEqual(outputs[1], outputs[3])
+        self.assertEqual(outputs[0].count('WARNING'), 3, outputs[0])
+
+    def test_cache_hits(self):
+        """Linting unchanged files a second time is served from our cache with the same output"""
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        outputs = []
+        for _ in range(2):
+            process = subprocess.Popen((sys.executable, rst_lint_path, '--stats', '--cache-dir', cache_dir,
+                                        valid_rst, invalid_rst), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                       universal_newlines=True)
+            stdout, stderr = process.communicate()
+            self.assertEqual(process.returncode, 2)
+            outputs.append((stdout, stderr))
+        self.assertEqual(outputs[0][0], outputs[1][0])
+        self.assertIn('WARNING {path}:2 Title underline too short.'.format(path=invalid_rst), outputs[1][0])
+        self.assertIn('cache: 0 hits, 2 misses', outputs[0][1])
+        self.assertIn('cache: 2 hits, 0 misses', outputs[1][1])
+
+    def test_cache_docutils_conf(self):
+        """Changing our `docutils.conf` doesn't serve results cached under its old settings"""
+        cwd = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cwd)
+        with open(os.path.join(cwd, 'raw.rst'), 'w') as f:
+            f.write('.. raw:: html\n\n   <br>\n')
+        env = dict(os.environ, PYTHONPATH=os.path.abspath(os.path.join(_dir, os.pardir, os.pardir)))
+        output = subprocess.check_output((sys.executable, rst_lint_path, '--cache-dir', cwd, 'raw.rst'),
+                                         cwd=cwd, env=env, universal_newlines=True)
+        self.assertEqual(output, '')
+
+        with open(os.path.join(cwd, 'docutils.conf'), 'w') as f:
+            f.write('[general]\nraw_enabled: no\n')
+        with self.assertRaises(subprocess.CalledProcessError) as e:
+            subprocess.check_output((sys.executable, rst_lint_path, '--cache-dir', cwd, 'raw.rst'),
+                                    cwd=cwd, env=env, universal_newlines=True)
+        self.assertIn('"raw" directive disabled.', e.exception.output)
+
+    @skipUnless(os.name == 'posix', 'Requires symlinks')
+    def test_unreadable_file(self):
+        """An unreadable file is reported as the file we encountered an issue with, with or without our cache"""
+        docs_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, docs_dir)
+        with open(os.path.join(docs_dir, 'a.rst'), 'w') as f:
+            f.write('Hello\n=====\n')
+        os.symlink(os.path.join(docs_dir, 'missing.rst'), os.path.join(docs_dir, 'c.rst'))
+        for cache_args in (('--cache-dir', docs_dir), ('--no-cache',)):
+            process = subprocess.Popen((sys.executable, rst_lint_path) + cache_args + (docs_dir,),
+                                       stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+            _, stderr = process.communicate()
+            self.assertEqual(process.returncode, 1)
+            self.assertIn('Encountered issue while linting: {path}\n'.format(path=os.path.join(docs_dir, 'c.rst')),
+                          stderr)
+
+    def test_report_file(self):
+        """Linting with `--stats` and `--report-file` summarizes our files, their sizes, durations, and errors"""
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        report_path = os.path.join(cache_dir, 'report.json')
+        reports = []
+        for _ in range(2):
+            process = subprocess.Popen((sys.executable, rst_lint_path, '--stats', '--report-file', report_path,
+                                        '--cache-dir', cache_dir, valid_rst, invalid_rst),
+                                       stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+            _, stderr = process.communicate()
+            self.assertEqual(process.returncode, 2)
+            total_bytes = os.path.getsize(valid_rst) + os.path.getsize(invalid_rst)
+            self.assertIn('Read {bytes} bytes in'.format(bytes=total_bytes), stderr)
+            self.assertIn('Errors: 1 (warning: 1)\nError types: WARNING: 1\n', stderr)
+            with open(report_path) as f:
+                reports.append(json.load(f))
+
+        report = reports[0]
+        self.assertEqual((report['total_files'], report['total_bytes'], report['total_errors']), (2, total_bytes, 1))
+        self.assertEqual(report['errors_by_level'], {'debug': 0, 'info': 0, 'warning': 1, 'error': 0, 'severe': 0})
+        self.assertEqual(report['errors_by_type'], {'WARNING': 1})
+        self.assertGreater(report['docs_per_sec'], 0)
+        self.assertEqual([(file_report['path'], file_report['errors'], file_report['errors_by_level'])
+                          for file_report in report['files']],
+                         [(valid_rst, 0, {}), (invalid_rst, 1, {'warning': 1})])
+        self.assertTrue(all(file_report['seconds'] > 0 for file_report in report['files']))
+
+        # Files served from our cache weren't linted so they have no duration
+        self.assertEqual(reports[1]['cache'], {'hits': 2, 'misses': 0})
+        self.assertEqual([(file_report['seconds'], file_report['cached']) for file_report in reports[1]['files']],
+                         [(None, True), (None, True)])
+
+    def _make_git_repo(self):
+        """Create a git repository with an invalid document committed in `docs` and `other`"""
+        repo_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, repo_dir)
+        for dirname in ('docs', 'other'):
+            os.mkdir(os.path.join(repo_dir, dirname))
+            self._write_file(os.path.join(repo_dir, dirname, 'committed.rst'), 'Hello\n====\n')
+        self._git(repo_dir, 'init', '-q')
+        self._git(repo_dir, 'add', '.')
+        self._git(repo_dir, 'commit', '-q', '-m', 'Initial commit')
+        return repo_dir
+
+    def _git(self, repo_dir, *args):
+        subprocess.check_output(('git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com') + args,
+                                cwd=repo_dir)
+
+    def _write_file(self, filepath, content):
+        with open(filepath, 'w') as f:
+            f.write(content)
+
+    def _run_in(self, cwd, *args):
+        # DEV: We run from inside of our repository so make sure our package is still importable
+        env = dict(os.environ, PYTHONPATH=os.path.abspath(os.path.join(_dir, os.pardir, os.pardir)))
+        process = subprocess.Popen((sys.executable, rst_lint_path) + args, cwd=cwd, env=env,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        stdout, _ = process.communicate()
+        return process.returncode, stdout
+
+    def test_changed_since(self):
+        """Linting with `--changed-since` only lints changed reST files, scoped by any paths"""
+        repo_dir = self._make_git_repo()
+        self._write_file(os.path.join(repo_dir, 'docs', 'committed.rst'), 'Hello\n====\n\nWorld\n')
+        self._write_file(os.path.join(repo_dir, 'other', 'new.rst'), 'Hello\n====\n')
+        self._write_file(os.path.join(repo_dir, 'other', 'new.txt'), 'Hello\n====\n')
+        self._git(repo_dir, 'add', 'other')
+
+        exit_code, stdout = self._run_in(repo_dir, '--no-cache', '--changed-since', 'HEAD')
+        self.assertEqual(exit_code, 2)
+        self.assertEqual(stdout, 'WARNING {docs}:2 Title underline too short.\n'
+                                 'WARNING {other}:2 Title underline too short.\n'.format(
+                                     docs=os.path.join('docs', 'committed.rst'),
+                                     other=os.path.join('other', 'new.rst')))
+
+        # Paths act as a scope filter, even when run from a subdirectory
+        exit_code, stdout = self._run_in(os.path.join(repo_dir, 'other'), '--no-cache', '--changed-since', 'HEAD',
+                                         os.path.join(os.pardir, 'docs'))
+        self.assertEqual(stdout, 'WARNING {docs}:2 Title underline too short.\n'.format(
+            docs=os.path.join(os.pardir, 'docs', 'committed.rst')))
+
+        # Nothing changed means nothing to lint
+        self._git(repo_dir, 'commit', '-q', '-a', '-m', 'Second commit')
+        self.assertEqual(self._run_in(repo_dir, '--no-cache', '--changed-since', 'HEAD'), (0, ''))
+
+        # Unknown refs are reported as an internal error
+        exit_code, stdout = self._run_in(repo_dir, '--no-cache', '--changed-since', 'not-a-ref')
+        self.assertEqual(exit_code, 1)
+        self.assertIn('git diff', stdout)
+
+    def test_staged(self):
+        """Linting with `--staged` only lints reST files with staged changes"""
+        repo_dir = self._make_git_repo()
+        self._write_file(os.path.join(repo_dir, 'docs', 'committed.rst'), 'Hello\n====\n\nWorld\n')
+        self._write_file(os.path.join(repo_dir, 'other', 'committed.rst'), 'Hello\n====\n\nWorld\n')
+        self._git(repo_dir, 'add', 'other')
+
+        exit_code, stdout = self._run_in(repo_dir, '--no-cache', '--staged')
+        self.assertEqual(exit_code, 2)
+        self.assertEqual(stdout, 'WARNING {other}:2 Title underline too short.\n'.format(
+            other=os.path.join('other', 'committed.rst')))
+
+    def test_no_cache(self):
+        """Linting with `--no-cache` writes nothing to our cache directory"""
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        subprocess.check_output((sys.executable, rst_lint_path, '--no-cache', '--cache-dir', cache_dir, valid_rst))
+        self.assertEqual(os.listdir(cache_dir), [])
+
+    def test_format_jsonl(self):
+        """Linting with `--format jsonl` writes one JSON error per line matching `--format json`"""
+        outputs = {}
+        for format in ('json', 'jsonl'):
+            with self.assertRaises(subprocess.CalledProcessError) as e:
+                subprocess.check_output((sys.executable, rst_lint_path, '--format', format,
+                                         invalid_rst, valid_rst, warning_rst), universal_newlines=True)
+            outputs[format] = e.exception.output
+        jsonl_errors = [json.loads(line) for line in outputs['jsonl'].splitlines()]
+        self.assertEqual(len(jsonl_errors), 2)
+        self.assertEqual(jsonl_errors, json.loads(outputs['json']))
+
+    def test_fail_fast(self):
+        """Linting with `--fail-fast` reports only the first error and stops linting further files"""
+        with self.assertRaises(subprocess.CalledProcessError) as e:
+            subprocess.check_output((sys.executable, rst_lint_path, '--no-cache', '--stats', '--fail-fast',
+                                     valid_rst, invalid_rst, warning_rst, invalid_rst),
+                                    stderr=subprocess.STDOUT, universal_newlines=True)
+        self.assertEqual(e.exception.returncode, 2)
+        # DEV: Our `--stats` summary also mentions `WARNING` so we only count reported errors
+        self.assertEqual(sum(line.startswith('WARNING ') for line in e.exception.output.splitlines()), 1,
+                         e.exception.output)
+        self.assertIn('Linted 2 files', e.exception.output)
+
+    def test_max_errors(self):
+        """Linting with `--max-errors` reports at most that many errors across every file"""
+        for jobs in ('1', '2'):
+            with self.assertRaises(subprocess.CalledProcessError) as e:
+                subprocess.check_output((sys.executable, rst_lint_path, '--no-cache', '--jobs', jobs,
+                                         '--max-errors', '2', invalid_rst, warning_rst, invalid_rst),
+                                        universal_newlines=True)
+            self.assertEqual(e.exception.output.splitlines(), [
+                'WARNING {path}:2 Title underline too short.'.format(path=invalid_rst),
+                'WARNING {path}:6 Title underline too short.'.format(path=warning_rst),
+            ])
+
+    def test_max_file_size(self):
+        """Linting with `--max-file-size` reports oversized files without linting them, even with a cache"""
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        small_rst = os.path.join(cache_dir, 'small.rst')
+        with open(small_rst, 'w') as f:
+            f.write('Hello\n====\n')
+        with self.assertRaises(subprocess.CalledProcessError) as e:
+            subprocess.check_output((sys.executable, rst_lint_path, '--cache-dir', cache_dir,
+                                     '--max-file-size', '16', small_rst, valid_rst),
+                                    universal_newlines=True)
+        self.assertEqual(e.exception.output.splitlines(), [
+            'WARNING {path}:2 Title underline too short.'.format(path=small_rst),
+            'FILE_TOO_LARGE {path}:None File is {size} bytes, larger than our maximum of 16 bytes. '
+            'Skipped linting it.'.format(path=valid_rst, size=os.path.getsize(valid_rst)),
+        ])
+
+        # Skipped files are reported at every level
+        with self.assertRaises(subprocess.CalledProcessError) as e:
+            subprocess.check_output((sys.executable, rst_lint_path, '--cache-dir', cache_dir, '--level', 'severe',
+                                     '--max-file-size', '16', small_rst, valid_rst),
+                                    universal_newlines=True)
+        self.assertEqual(len(e.exception.output.splitlines()), 1)
+        self.assertIn('FILE_TOO_LARGE {path}:None'.format(path=valid_rst), e.exception.output)
+
+    def test_timeout(self):
+        """Linting with `--timeout` reports files which take too long and continues with the rest"""
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        for _ in range(2):
+            with self.assertRaises(subprocess.CalledProcessError) as e:
+                subprocess.check_output((sys.executable, rst_lint_path, '--cache-dir', cache_dir, '--timeout', '0.05',
+                                         wide_grid_table_rst, invalid_rst), universal_newlines=True)
+            # DEV: Our second run still times out since timeouts are never cached
+            self.assertEqual(e.exception.output.splitlines(), [
+                'TIMEOUT {path}:None Linting took longer than 0.05 seconds. Stopped linting it.'.format(
+                    path=wide_grid_table_rst),
+                'WARNING {path}:2 Title underline too short.'.format(path=invalid_rst),
+            ])
+
+        # Files we didn't finish linting are reported at every level
+        with self.assertRaises(subprocess.CalledProcessError) as e:
+            subprocess.check_output((sys.executable, rst_lint_path, '--no-cache', '--level', 'severe', '--timeout',
+                                     '0.05', long_simple_table_rst), universal_newlines=True)
+        self.assertEqual(e.exception.returncode, 2)
+        self.assertIn('TIMEOUT {path}:None'.format(path=long_simple_table_rst), e.exception.output)
+
+    def test_transforms(self):
+        """Linting with `--transforms` and `--skip-transform` changes which transforms are applied"""
+        invalid_target_rst = os.path.join(_dir, 'test_files', 'invalid_target.rst')
+        for args in (('--transforms', 'none'), ('--transforms', 'PropagateTargets,DocTitle'),
+                     ('--skip-transform', 'SmartQuotes', '--skip-transform', 'DanglingReferences')):
+            output = subprocess.check_output((sys.executable, rst_lint_path, '--no-cache') + args +
+                                             (invalid_target_rst,), universal_newlines=True)
+            self.assertEqual(output, '')
+        with self.assertRaises(subprocess.CalledProcessError) as e:
+            subprocess.check_output((sys.executable, rst_lint_path, '--no-cache', '--transforms', 'references-only',
+                                     invalid_target_rst), universal_newlines=True)
+        self.assertIn('Unknown target name', e.exception.output)
+
+    def test_profile(self):
+        """Linting with `--profile` prints the slowest files and a per-phase breakdown to stderr"""
+        process = subprocess.Popen((sys.executable, rst_lint_path, '--profile', valid_rst, invalid_rst),
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        stdout, stderr = process.communicate()
+        self.assertEqual(process.returncode, 2)
+        self.assertEqual(stdout.count('WARNING'), 1)
+        self.assertIn('Slowest files:', stderr)
+        self.assertIn(valid_rst, stderr)
+        self.assertIn('parse\n', stderr)
+        self.assertIn('transform:DanglingReferences', stderr)
+        self.assertIn('Documents: 2', stderr)
+
+    def test_lazy_imports(self):
+        """Importing our library and running `--version` never loads `docutils`"""
+        script = textwrap.dedent("""
+        import sys
+        import restructuredtext_lint
+        from restructuredtext_lint import cli
+        sys.argv = ['rst-lint', '--version']
+        try:
+            cli.main()
+        except SystemExit:
+            pass
+        sys.stdout.write(repr([name for name in sys.modules if name.split('.')[0] == 'docutils']))
+        """)
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.join(_dir, os.pardir, os.pardir)] +
+                                                          sys.path))
+        output = subprocess.check_output((sys.executable, '-c', script), env=env, universal_newlines=True)
+        self.assertTrue(output.endswith('[]'), output)
+        self.assertIn(restructuredtext_lint.cli.VERSION, output)
+
+
+class TestRestructuredtextLintServer(TestCase):
+    """Tests for 'rst-lint --serve' and 'rst-lint-client'"""
+
+    def _request(self, request_id, method, params=None):
+        return json.dumps({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params or {}})
+
+    def test_serve_stdio(self):
+        """A stdio server answers many lint requests from one process"""
+        requests = '\n'.join([
+            self._request(1, 'lint', {'content': 'Hello\n=====\n\nWorld\n'}),
+            self._request(2, 'lint_file', {'filepath': invalid_rst}),
+            self._request(3, 'missing'),
+            self._request(4, 'shutdown'),
+        ]) + '\n'
+        output = subprocess.check_output((sys.executable, rst_lint_path, '--serve'), input=requests,
+                                         universal_newlines=True)
+        responses = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual([response['id'] for response in responses], [1, 2, 3, 4])
+        self.assertEqual(responses[0]['result'], [])
+        self.assertEqual(responses[1]['result'][0]['line'], 2)
+        self.assertEqual(responses[1]['result'][0]['source'], invalid_rst)
+        self.assertEqual(responses[1]['result'][0]['message'], 'Title underline too short.')
+        self.assertEqual(responses[2]['error']['code'], -32601)
+
+    def test_run_rejects_long_running(self):
+        """`run` requests can't start modes which never reply (e.g. `--watch`)"""
+        requests = '\n'.join([
+            self._request(1, 'run', {'args': ['--watch', valid_rst]}),
+            self._request(2, 'run', {'args': ['--serve']}),
+            self._request(3, 'run', {'args': ['--socket', 'other.sock', valid_rst]}),
+            self._request(4, 'shutdown'),
+        ]) + '\n'
+        output = subprocess.check_output((sys.executable, rst_lint_path, '--serve'), input=requests,
+                                         universal_newlines=True, timeout=30)
+        responses = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual([response['id'] for response in responses], [1, 2, 3, 4])
+        for response in responses[:3]:
+            self.assertEqual(response['result']['exit_code'], 2)
+            self.assertIn('cannot be used via rst-lint-client', response['result']['stderr'])
+
+    def test_serve_socket_existing_file(self):
+        """A socket server refuses to replace a file which isn't a socket"""
+        socket_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, socket_dir)
+        notes_path = os.path.join(socket_dir, 'notes.txt')
+        with open(notes_path, 'w') as f:
+            f.write('Keep me\n')
+        process = subprocess.Popen((sys.executable, rst_lint_path, '--serve', '--socket', notes_path),
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        _, stderr = process.communicate(timeout=30)
+        self.assertEqual(process.returncode, 1)
+        self.assertIn('is not a socket', stderr)
+        with open(notes_path) as f:
+            self.assertEqual(f.read(), 'Keep me\n')
+
+    def test_client_without_reply(self):
+        """`rst-lint-client` reports a server which closes our connection without replying"""
+        socket_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, socket_dir)
+        socket_path = os.path.join(socket_dir, 'rst-lint.sock')
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(listener.close)
+        listener.bind(socket_path)
+        listener.listen(1)
+
+        def close_connection():
+            connection, _ = listener.accept()
+            with connection.makefile('rb') as connection_file:
+                connection_file.readline()
+            connection.close()
+        thread = threading.Thread(target=close_connection)
+        thread.start()
+        self.addCleanup(thread.join)
+
+        process = subprocess.Popen((sys.executable, rst_lint_client_path, '--socket', socket_path, valid_rst),
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        _, stderr = process.communicate(timeout=30)
+        self.assertEqual(process.returncode, 1)
+        self.assertIn('Unable to lint via', stderr)
+        self.assertNotIn('Traceback', stderr)
+
+    def test_serve_socket_client(self):
+        """`rst-lint-client` produces the same output and exit code as `rst-lint` via a socket server"""
+        socket_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, socket_dir)
+        socket_path = os.path.join(socket_dir, 'rst-lint.sock')
+        server = subprocess.Popen((sys.executable, rst_lint_path, '--serve', '--socket', socket_path))
+        self.addCleanup(server.wait)
+        for _ in range(100):
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.05)
+
+        try:
+            with self.assertRaises(subprocess.CalledProcessError) as e:
+                subprocess.check_output((sys.executable, rst_lint_client_path, '--socket', socket_path,
+                                         '--no-cache', valid_rst, invalid_rst), universal_newlines=True)
+            self.assertEqual(e.exception.returncode, 2)
+            self.assertEqual(e.exception.output,
+                             'WARNING {path}:2 Title underline too short.\n'.format(path=invalid_rst))
+            output = subprocess.check_output((sys.executable, rst_lint_client_path, '--socket', socket_path,
+                                              '--no-cache', valid_rst), universal_newlines=True)
+            self.assertEqual(output, '')
+        finally:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(socket_path)
+            sock.sendall((self._request(1, 'shutdown') + '\n').encode('utf-8'))
+            sock.recv(1024)
+            sock.close()
+
+
+class TestResultCache(TestCase):
+    """Tests for our on-disk result cache"""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+    def test_key_changes_with_options(self):
+        """Cache keys depend on content and lint options"""
+        cache = ResultCache(self.cache_dir, '1.0.0')
+        key = cache.key(b'Hello', {'rst_prolog': None})
+        self.assertEqual(key, cache.key(b'Hello', {'rst_prolog': None}))
+        self.assertNotEqual(key, cache.key(b'World', {'rst_prolog': None}))
+        self.assertNotEqual(key, cache.key(b'Hello', {'rst_prolog': '.. |a| replace:: b'}))
+        self.assertNotEqual(key, ResultCache(self.cache_dir, '2.0.0').key(b'Hello', {'rst_prolog': None}))
+        self.assertIsNone(cache.key(b'.. include:: other.rst', {}))
+
+    def test_key_changes_with_settings(self):
+        """Cache keys depend on our `docutils` settings"""
+        settings = _get_default_linter().settings
+        key = ResultCache(self.cache_dir, '1.0.0', settings=settings).key(b'Hello', {})
+        self.assertEqual(key, ResultCache(self.cache_dir, '1.0.0', settings=settings).key(b'Hello', {}))
+        other_settings = type(settings)(dict(vars(settings), raw_enabled=False))
+        self.assertNotEqual(key, ResultCache(self.cache_dir, '1.0.0', settings=other_settings).key(b'Hello', {}))
+
+    def test_prune(self):
+        """Pruning evicts the least recently used entries once over our size limit"""
+        cache = ResultCache(self.cache_dir, '1.0.0', max_size=0)
+        cache.set('aa' + 'a' * 62, [])
+        self.assertEqual(cache.get('aa' + 'a' * 62), [])
+        cache.prune()
+        self.assertIsNone(cache.get('aa' + 'a' * 62))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_prune_without_writes(self):
+        """Pruning is skipped when nothing was written to our cache"""
+        ResultCache(self.cache_dir, '1.0.0').set('aa' + 'a' * 62, [])
+        cache = ResultCache(self.cache_dir, '1.0.0', max_size=0)
+        self.assertEqual(cache.get('aa' + 'a' * 62), [])
+        cache.prune()
+        self.assertEqual(cache.get('aa' + 'a' * 62), [])
+
+
+class TestIncrementalLinter(TestCase):
+    """Tests for re-linting only the edited sections of a document"""
+    content = textwrap.dedent("""
+    Title
+    =====
+
+    Intro referencing later-target_ and |sub|.
+
+    .. |sub| replace:: Substituted
+
+    Section One
+    -----------
+
+    Referencing missing-target_.
+
+    Section Two
+    -----------
+
+    .. _later-target:
+
+    Too short
+    ^^^^
+
+    Section Three
+    -------------
+
+    .. _later-target:
+
+    Duplicate target above, `anonymous`__ link below.
+    """)
+
+    def assertMatchesLint(self, errors, content, rst_prolog=None):
+        expected_errors = restructuredtext_lint.lint(content, 'doc.rst', rst_prolog=rst_prolog, compact=True)
+        self.assertEqual(sorted((error.line, error.source, error.level, error.message) for error in errors),
+                         sorted((error.line, error.source, error.level, error.message) for error in expected_errors))
+
+    def test_matches_lint(self):
+        """Incremental linting reports the same errors as linting the entire document"""
+        linter = restructuredtext_lint.IncrementalLinter(min_section_lines=0)
+        errors = linter.lint(self.content, 'doc.rst')
+        self.assertMatchesLint(errors, self.content)
+        self.assertEqual(linter.reparsed_count, 4)
+        self.assertEqual([error.line for error in errors], sorted(error.line or 0 for error in errors))
+        self.assertIn('Duplicate explicit target name: "later-target".', [error.message for error in errors])
+        self.assertIn('Unknown target name: "missing-target".', [error.message for error in errors])
+
+    def test_duplicate_targets_across_sections(self):
+        """Errors from registering names depend on earlier sections, so they match linting the entire document"""
+        content = textwrap.dedent("""\
+            Title
+            =====
+
+            One
+            ---
+
+            .. _ref: http://a
+            .. _ref: http://b
+
+            Two
+            ---
+
+            .. _ref: http://a
+            .. _ref: http://a
+        """)
+        linter = restructuredtext_lint.IncrementalLinter(min_section_lines=1)
+        self.assertMatchesLint(linter.lint(content, 'doc.rst'), content)
+
+        # Section errors dropped by our full lint stay dropped when we reuse our results
+        content = content.replace('One\n---\n', 'One\n---\n\nNew paragraph.\n')
+        errors = linter.lint(content, 'doc.rst')
+        self.assertMatchesLint(errors, content)
+        self.assertFalse(linter.full_lint)
+        content = content.replace('Two\n---\n', 'Two\n---\n\nNew paragraph.\n')
+        self.assertMatchesLint(linter.lint(content, 'doc.rst'), content)
+
+    def test_rst_prolog(self):
+        """Sections parsed with our prolog still notice new references and targets"""
+        rst_prolog = '.. _pt: http://a\n'
+        linter = restructuredtext_lint.IncrementalLinter(rst_prolog=rst_prolog)
+        for content in ('Other\n=====\n\n.. unknown-directive::\n', '.. unknown-directive::\n',
+                        '`Dup`_ link\n\n.. unknown-directive::\n'):
+            errors = linter.lint(content, 'doc.rst')
+            self.assertMatchesLint(errors, content, rst_prolog=rst_prolog)
+        self.assertIn('Unknown target name: "dup".', [error.message for error in errors])
+
+    def test_edited_section(self):
+        """Editing a section only parses that section again and shifts the errors after it"""
+        linter = restructuredtext_lint.IncrementalLinter(min_section_lines=0)
+        linter.lint(self.content, 'doc.rst')
+
+        # Adding lines without touching names or references reuses everything else
+        content = self.content.replace('Referencing missing-target_.', 'New paragraph.\n\nReferencing missing-target_.')
+        errors = linter.lint(content, 'doc.rst')
+        self.assertMatchesLint(errors, content)
+        self.assertEqual((linter.reparsed_count, linter.full_lint), (1, False))
+
+        # Adding a reference checks our entire document again
+        content = content.replace('New paragraph.', 'New unknown_ reference.')
+        errors = linter.lint(content, 'doc.rst')
+        self.assertMatchesLint(errors, content)
+        self.assertEqual((linter.reparsed_count, linter.full_lint), (1, True))
+        self.assertIn('Unknown target name: "unknown".', [error.message for error in errors])
+
+        # Linting the same content again parses nothing
+        self.assertEqual(linter.lint(content, 'doc.rst'), errors)
+        self.assertEqual((linter.reparsed_count, linter.full_lint), (0, False))
+
+    def test_section_levels(self):
+        """Sections are parsed with the same title styles as the rest of their document"""
+        content = textwrap.dedent("""
+        =====
+        Title
+        =====
+
+        One
+        ===
+
+        Sub
+        ---
+
+        Deep
+        ~~~~
+
+        Two
+        ===
+
+        Skipped
+        ~~~~~~~
+
+        Three
+        =====
+        """)
+        linter = restructuredtext_lint.IncrementalLinter(min_section_lines=0)
+        errors = linter.lint(content, 'doc.rst')
+        self.assertMatchesLint(errors, content)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(linter._cross_errors, [])
+
+
+class TestWatch(TestCase):
+    """Tests for re-linting files as they change"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.filepath = os.path.join(self.root, 'doc.rst')
+
+    def _write(self, content):
+        with open(self.filepath, 'w') as f:
+            f.write(content)
+
+    def test_watch_reports_new_and_resolved_errors(self):
+        """Watching prints new and resolved errors for each modified file"""
+        class ScriptedWatcher(object):
+            def __init__(self, steps):
+                self.steps = list(steps)
+
+            def watch_directories(self, dirpaths):
+                pass
+
+            def wait(self):
+                if not self.steps:
+                    raise KeyboardInterrupt()
+                self.steps.pop(0)()
+
+            def close(self):
+                pass
+
+        self._write('Hello\n====\n')
+        stream = io.StringIO()
+        watcher = ScriptedWatcher([
+            # Moving our error down a line isn't a new error
+            lambda: self._write('\nHello\n====\n\nWorld\n'),
+            lambda: self._write('Hello\n=====\n\nunknown_\n'),
+            lambda: os.remove(self.filepath),
+        ])
+        watch([self.root], stream=stream, watcher=watcher)
+        self.assertEqual(stream.getvalue(), (
+            '+ WARNING {path}:2 Title underline too short.\n'
+            '- WARNING {path}:3 Title underline too short.\n'
+            '+ ERROR {path}:4 Unknown target name: "unknown".\n'
+            '- ERROR {path}:4 Unknown target name: "unknown".\n'
+        ).format(path=self.filepath))
+
+    @skipUnless(sys.platform.startswith('linux'), 'inotify is only available on Linux')
+    def test_inotify_watcher(self):
+        """Our inotify watcher wakes up once one of our directories changes"""
+        watcher = InotifyWatcher()
+        self.addCleanup(watcher.close)
+        watcher.watch_directories([self.root])
+        self._write('Hello\n')
+        start = time.time()
+        watcher.wait()
+        self.assertLess(time.time() - start, 1)
+
+
+class TestAsync(TestCase):
+    """Tests for linting from `asyncio` code"""
+
+    def test_alint(self):
+        """Linting without blocking our event loop returns the same errors as `lint`, in every pool"""
+        content = 'Hello\n====\n\nunknown_\n'
+        expected_errors = [(err.line, err.source, err.full_message)
+                           for err in restructuredtext_lint.lint(content, 'a.rst')]
+        self.assertEqual(len(expected_errors), 2)
+        for async_linter in (AsyncLinter(workers=2), AsyncLinter(workers=2, pool='thread')):
+            errors = asyncio.run(async_linter.lint(content, 'a.rst'))
+            self.assertEqual([(err.line, err.source, err.full_message) for err in errors], expected_errors)
+        errors = asyncio.run(alint(content, 'a.rst', compact=True))
+        self.assertEqual([(err.line, err.source, err.full_message) for err in errors], expected_errors)
+
+    def test_alint_files(self):
+        """Linting many files returns their errors in order while capping how many are linted at once"""
+        async_linter = AsyncLinter(workers=2, pool='thread', max_concurrency=2)
+        filepaths = [invalid_rst, valid_rst, warning_rst, invalid_rst, valid_rst]
+        self.assertEqual(
+            [[(err.line, err.message) for err in errors]
+             for errors in asyncio.run(async_linter.lint_files(filepaths))],
+            [[(err.line, err.message) for err in errors] for errors in restructuredtext_lint.lint_files(filepaths)])
+        self.assertEqual(asyncio.run(alint_files([valid_rst])), [[]])
+
+    def test_alint_timeout(self):
+        """Documents which take longer than their timeout raise a `TimeoutError` without blocking other documents"""
+        content = '\n'.join('Section {i}\n==========\n\n- a\n\n  - b\n'.format(i=i) for i in range(200))
+        async_linter = AsyncLinter(workers=2, pool='thread')
+
+        async def lint_both():
+            return await asyncio.gather(async_linter.lint(content, timeout=0.001), async_linter.lint('Hello\n'),
+                                        return_exceptions=True)
+        timeout_error, errors = asyncio.run(lint_both())
+        self.assertIsInstance(timeout_error, asyncio.TimeoutError)
+        self.assertEqual(errors, [])
+
+
+class TestDiscovery(TestCase):
+    """Tests for finding files to lint"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def _touch(self, *relative_paths):
+        for relative_path in relative_paths:
+            filepath = os.path.join(self.root, *relative_path.split('/'))
+            if not os.path.isdir(os.path.dirname(filepath)):
+                os.makedirs(os.path.dirname(filepath))
+            with open(filepath, 'w') as f:
+                f.write('Hello\n')
+
+    def _discover(self, **kwargs):
+        return [os.path.relpath(filepath, self.root).replace(os.sep, '/')
+                for filepath in iter_directory_files(self.root, **kwargs)]
+
+    def test_prunes_default_directories(self):
+        """Tooling directories, build output, and virtualenvs are never searched"""
+        self._touch('index.rst', 'notes.rest', 'notes.txt', 'docs/a.rst', 'docs/_build/a.rst', '.git/a.rst',
+                    'node_modules/pkg/README.rst', 'env/pyvenv.cfg', 'env/lib/README.rst')
+        self.assertEqual(self._discover(), ['index.rst', 'notes.rest', 'docs/a.rst'])
+
+    @skipUnless(os.name == 'posix', 'Creating symlinks requires POSIX')
+    def test_symlinks(self):
+        """Symlinks to files are linted but symlinks to directories aren't followed, same as `os.walk`"""
+        self._touch('docs/a/index.rst', 'other/b.rst')
+        os.symlink(os.pardir, os.path.join(self.root, 'docs', 'a', 'loop'))
+        os.symlink(os.path.join(self.root, 'other'), os.path.join(self.root, 'docs', 'other'))
+        os.symlink(os.path.join(self.root, 'other', 'b.rst'), os.path.join(self.root, 'docs', 'c.rst'))
+        self.assertEqual(self._discover(), ['docs/c.rst', 'docs/a/index.rst', 'other/b.rst'])
+
+    def test_include_exclude(self):
+        """Include globs add files, exclude globs skip files and entire directories"""
+        self._touch('index.rst', 'notes.txt', 'docs/a.rst', 'docs/b.txt', 'docs/skip/c.rst', 'other/d.rst')
+        self.assertEqual(self._discover(include=['*.txt'], exclude=['docs/skip', 'd.rst']),
+                         ['index.rst', 'notes.txt', 'docs/a.rst', 'docs/b.txt'])
+
+    def test_gitignore(self):
+        """Files and directories ignored by `.gitignore` files are skipped, including via parent directories"""
+        self._touch('.git/HEAD', 'generated.rst', 'keep.rst', 'docs/a.rst', 'docs/tmp/b.rst', 'docs/nested/c.rst',
+                    'build/d.rst')
+        with open(os.path.join(self.root, '.gitignore'), 'w') as f:
+            f.write('# Comment\n*.rst\n!keep.rst\n!docs/**/\n/build/\n')
+        with open(os.path.join(self.root, 'docs', '.gitignore'), 'w') as f:
+            f.write('!*.rst\ntmp/\n')
+        self.assertEqual(self._discover(), ['keep.rst', 'docs/a.rst', 'docs/nested/c.rst'])
+        self.assertEqual([os.path.relpath(filepath, self.root).replace(os.sep, '/')
+                          for filepath in iter_directory_files(os.path.join(self.root, 'docs'))],
+                         ['docs/a.rst', 'docs/nested/c.rst'])
+        self.assertEqual(len(self._discover(gitignore=False)), 6)
+
+    def test_cli_include_exclude(self):
+        """`rst-lint` accepts `--include` and `--exclude` globs"""
+        self._touch('valid.rst', 'skip/valid.rst')
+        with open(os.path.join(self.root, 'invalid.txt'), 'w') as f:
+            f.write('Hello\n====\n')
+        process = subprocess.Popen((sys.executable, rst_lint_path, '--no-cache', '--include', '*.txt',
+                                    '--exclude', 'skip', self.root), stdout=subprocess.PIPE, universal_newlines=True)
+        stdout, _ = process.communicate()
+        self.assertEqual(process.returncode, 2)
+        self.assertEqual(stdout, 'WARNING {path}:2 Title underline too short.\n'.format(
+            path=os.path.join(self.root, 'invalid.txt')))
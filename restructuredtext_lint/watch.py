@@ -0,0 +1,239 @@
+# Load in our dependencies
+from __future__ import absolute_import
+from collections import Counter
+import ctypes
+import ctypes.util
+import errno
+import json
+import os
+import select
+import sys
+import time
+
+from restructuredtext_lint.cli import _iter_error_dicts, DEFAULT_FORMAT, DEFAULT_JOBS, WATCH_INTERVAL
+from restructuredtext_lint.discovery import iter_files
+
+# Define constants
+DEFAULT_INTERVAL = WATCH_INTERVAL  # Seconds between polls when inotify is unavailable
+# DEV: Editors often save via several writes (or a write and a rename) so we wait for things to settle
+DEBOUNCE_SECONDS = 0.05
+
+# Define our inotify constants
+# http://man7.org/linux/man-pages/man7/inotify.7.html
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+
+class PollingWatcher(object):
+    """Watcher which wakes up every `interval` seconds to look for changes"""
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+
+    def watch_directories(self, dirpaths):
+        pass
+
+    def wait(self):
+        time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher(object):
+    """Watcher which sleeps until something changes in one of our directories (Linux only)
+
+    If we run out of inotify watches, we fall back to waking up every `interval` seconds as well
+
+    :raises OSError: If inotify is unavailable
+    """
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.timeout = None
+        try:
+            self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except AttributeError:
+            raise OSError(errno.ENOSYS, 'inotify is not supported')
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def watch_directories(self, dirpaths):
+        # DEV: Watching an already watched directory reuses its watch and deleted directories drop theirs,
+        #      so we can add every directory after each scan to pick up new (or recreated) directories
+        for dirpath in dirpaths:
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath), WATCH_MASK)
+            # DEV: If we're out of watches (`fs.inotify.max_user_watches`), then start polling as well
+            if wd < 0 and ctypes.get_errno() == errno.ENOSPC:
+                self.timeout = self.interval
+
+    def _drain(self):
+        # DEV: We rescan our files after waking up so we don't need to parse each event
+        while True:
+            try:
+                if not os.read(self._fd, 64 * 1024):
+                    return
+            except BlockingIOError:
+                return
+
+    def wait(self):
+        readable, _, _ = select.select([self._fd], [], [], self.timeout)
+        while readable:
+            self._drain()
+            readable, _, _ = select.select([self._fd], [], [], DEBOUNCE_SECONDS)
+
+    def close(self):
+        os.close(self._fd)
+
+
+def create_watcher(interval=DEFAULT_INTERVAL):
+    """Create an inotify watcher where available, otherwise fall back to polling"""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(interval)
+        except OSError:
+            pass
+    return PollingWatcher(interval)
+
+
+def _scan(paths, include=None, exclude=None):
+    """Find every file to lint and its modification time and size
+
+    :rtype tuple: `(snapshot, dirpaths)` tuple where `snapshot` is a dict of filepath to stat info
+    """
+    dirpaths = []
+    snapshot = {}
+    for filepath in iter_files(paths, include=include, exclude=exclude, directories=dirpaths):
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            continue
+        snapshot[filepath] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot, dirpaths
+
+
+def _error_key(error_dict):
+    # DEV: We ignore line numbers so errors which only moved (e.g. after adding a paragraph above them) aren't new
+    return (error_dict['level'], error_dict['type'], error_dict['message'])
+
+
+def _diff_errors(previous_errors, current_errors):
+    """Find which errors are new and which were resolved between two lints of a file
+
+    :rtype tuple: `(new errors, resolved errors)` tuple
+    """
+    previous_counts = Counter(_error_key(error) for error in previous_errors)
+    current_counts = Counter(_error_key(error) for error in current_errors)
+    new_errors = []
+    for error in current_errors:
+        key = _error_key(error)
+        if previous_counts[key]:
+            previous_counts[key] -= 1
+        else:
+            new_errors.append(error)
+    resolved_errors = []
+    for error in previous_errors:
+        key = _error_key(error)
+        if current_counts[key]:
+            current_counts[key] -= 1
+        else:
+            resolved_errors.append(error)
+    return new_errors, resolved_errors
+
+
+def _write_errors(stream, format, errors, status):
+    for err in errors:
+        if format == 'jsonl':
+            stream.write(json.dumps(dict(err, status=status)) + '\n')
+        else:
+            # e.g. + WARNING readme.rst:12 Title underline too short.
+            stream.write('{prefix} {err[type]} {err[source]}:{err[line]} {err[message]}\n'.format(
+                prefix='+' if status == 'new' else '-', err=err))
+
+
+def watch(paths, stream=sys.stdout, format=DEFAULT_FORMAT, level=0, jobs=DEFAULT_JOBS, interval=DEFAULT_INTERVAL,
+          include=None, exclude=None, watcher=None, **kwargs):
+    """Lint our files, then re-lint any files which change and print which errors are new or resolved
+
+    Runs until interrupted (e.g. via Ctrl+C)
+
+    :param list paths: Files and directories to watch
+    :param string format: Format of our output, either `text` or `jsonl`
+    :param float interval: Seconds between polls when inotify is unavailable
+    :param watcher: Optional watcher to wait for changes with (default: `create_watcher(interval)`)
+    :param kwargs: Additional keyword arguments to be passed to ``lint_file``
+    """
+    # Verify all of our paths exist before we start watching
+    for path in paths:
+        if not os.path.exists(path):
+            stream.write('Path "{path}" not found as a file nor directory\n'.format(path=path))
+            sys.exit(1)
+            return
+
+    watcher = watcher or create_watcher(interval)
+    snapshot = {}
+    errors_by_filepath = {}
+    try:
+        while True:
+            current_snapshot, dirpaths = _scan(paths, include=include, exclude=exclude)
+            watcher.watch_directories(dirpaths)
+
+            # Lint only the files which were added or modified since our last scan
+            changed_filepaths = [filepath for filepath, stat in current_snapshot.items()
+                                 if snapshot.get(filepath) != stat]
+            removed_filepaths = [filepath for filepath in snapshot if filepath not in current_snapshot]
+            new_count = 0
+            resolved_count = 0
+            current_errors = {}
+            file_errors_iter = _iter_error_dicts(changed_filepaths, jobs=jobs, level=level, **kwargs)
+            for i, filepath in enumerate(changed_filepaths):
+                try:
+                    file_errors, _ = next(file_errors_iter)
+                except (IOError, OSError):
+                    # DEV: Our file was removed between our scan and our lint, our next scan will resolve it.
+                    #      Our generator is done after raising, so restart it for our remaining files
+                    file_errors = []
+                    file_errors_iter = _iter_error_dicts(changed_filepaths[i + 1:], jobs=jobs, level=level,
+                                                         **kwargs)
+                current_errors[filepath] = [err for err in file_errors if err['level'] >= level]
+            for filepath in removed_filepaths:
+                current_errors[filepath] = []
+
+            # Report what changed for each file
+            for filepath, file_errors in current_errors.items():
+                new_errors, resolved_errors = _diff_errors(errors_by_filepath.get(filepath, []), file_errors)
+                _write_errors(stream, format, resolved_errors, 'resolved')
+                _write_errors(stream, format, new_errors, 'new')
+                new_count += len(new_errors)
+                resolved_count += len(resolved_errors)
+                if file_errors:
+                    errors_by_filepath[filepath] = file_errors
+                else:
+                    errors_by_filepath.pop(filepath, None)
+            stream.flush()
+            snapshot = current_snapshot
+
+            # DEV: Our summary goes to `stderr` to keep `stdout` parseable
+            if changed_filepaths or removed_filepaths:
+                sys.stderr.write('Linted {count} files ({new} new, {resolved} resolved, {total} total errors). '
+                                 'Watching {watched} files for changes...\n'.format(
+                                     count=len(changed_filepaths), new=new_count, resolved=resolved_count,
+                                     total=sum(len(errors) for errors in errors_by_filepath.values()),
+                                     watched=len(snapshot)))
+            watcher.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
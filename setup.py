@@ -28,7 +28,8 @@ setup(
     entry_points={
         'console_scripts': [
             'restructuredtext-lint = restructuredtext_lint.cli:main',
-            'rst-lint = restructuredtext_lint.cli:main'
+            'rst-lint = restructuredtext_lint.cli:main',
+            'rst-lint-client = restructuredtext_lint.client:main'
         ]
     },
     packages=find_packages(),